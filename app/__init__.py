@@ -13,6 +13,17 @@ def create_app():
     """
     app = Flask(__name__)
 
+    # --- JSON Serialization & Response Compression ---
+    # orjson-backed provider with ISO 8601 datetimes; large responses are
+    # compressed with brotli or gzip depending on what the client accepts.
+    from app.json_provider import FastJSONProvider
+    from app.compression import init_compression
+    app.json = FastJSONProvider(app)
+    app.config['COMPRESS_MIN_SIZE'] = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+    app.config['COMPRESS_GZIP_LEVEL'] = int(os.getenv('COMPRESS_GZIP_LEVEL', 6))
+    app.config['COMPRESS_BROTLI_QUALITY'] = int(os.getenv('COMPRESS_BROTLI_QUALITY', 5))
+    init_compression(app)
+
     # --- Core Application Configuration ---
     # Load secret keys from environment variables. Crucial for security.
     app.config['SECRET_KEY'] = os.getenv('SECRET_KEY')
@@ -28,6 +39,68 @@ def create_app():
     app.config['SMTP_SERVER'] = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
     app.config['SMTP_PORT'] = int(os.getenv('SMTP_PORT', 587))
 
+    # --- Admin Notification Digest Configuration ---
+    # Admin notifications are batched into one email per window (0 sends each immediately)
+    app.config['ADMIN_DIGEST_WINDOW_SECONDS'] = int(os.getenv('ADMIN_DIGEST_WINDOW_SECONDS', 300))
+    app.config['ADMIN_DIGEST_MAX_ITEMS'] = int(os.getenv('ADMIN_DIGEST_MAX_ITEMS', 50))
+    # Project inquiries with a budget at or above this amount are emailed immediately (0 disables)
+    app.config['PRIORITY_BUDGET_THRESHOLD'] = float(os.getenv('PRIORITY_BUDGET_THRESHOLD', 0))
+
+    # --- Newsletter Campaign Configuration ---
+    # Optional overrides for the per-provider send limits in app/campaigns.py
+    app.config['CAMPAIGN_RATE_PER_MINUTE'] = int(os.getenv('CAMPAIGN_RATE_PER_MINUTE', 0)) or None
+    app.config['CAMPAIGN_MESSAGES_PER_SESSION'] = int(os.getenv('CAMPAIGN_MESSAGES_PER_SESSION', 0)) or None
+    # How long a sending worker may go without checkpointing before another can resume
+    app.config['CAMPAIGN_LEASE_SECONDS'] = int(os.getenv('CAMPAIGN_LEASE_SECONDS', 600))
+    # A campaign pauses after this many sends in a row fail (e.g. a daily quota was hit)
+    app.config['CAMPAIGN_MAX_CONSECUTIVE_FAILURES'] = int(os.getenv('CAMPAIGN_MAX_CONSECUTIVE_FAILURES', 5))
+
+    # --- Concurrent I/O Configuration ---
+    # Pool size for running independent Firestore/SMTP calls side by side
+    app.config['CONCURRENT_IO_WORKERS'] = int(os.getenv('CONCURRENT_IO_WORKERS', 16))
+    # Separate, smaller pool for Cloudinary uploads so they can't starve the one above
+    app.config['UPLOAD_IO_WORKERS'] = int(os.getenv('UPLOAD_IO_WORKERS', 4))
+    # Most files accepted with a single project inquiry
+    app.config['MAX_INQUIRY_FILES'] = int(os.getenv('MAX_INQUIRY_FILES', 5))
+
+    # --- Admission Control Configuration ---
+    # Per-process concurrency caps for expensive endpoint classes. Every admitted
+    # or queued request holds a worker thread, so keep the sum of limit + queue
+    # across all classes well below the Procfile's --threads (16): the defaults
+    # total 8, leaving half the threads for everything else.
+    app.config['ADMISSION_LIMITS'] = {
+        # Multipart media uploads: project inquiries and portfolio create/update
+        'upload': {
+            'limit': int(os.getenv('UPLOAD_CONCURRENCY_LIMIT', 2)),
+            'queue': int(os.getenv('UPLOAD_QUEUE_SIZE', 2)),
+            'timeout': float(os.getenv('UPLOAD_QUEUE_TIMEOUT_SECONDS', 2)),
+        },
+        # Long-running admin jobs: subscriber import, exports, campaign snapshots
+        'bulk': {
+            'limit': int(os.getenv('BULK_CONCURRENCY_LIMIT', 1)),
+            'queue': int(os.getenv('BULK_QUEUE_SIZE', 1)),
+            'timeout': float(os.getenv('BULK_QUEUE_TIMEOUT_SECONDS', 2)),
+        },
+        # Open /admin/stream connections, each of which holds a thread while
+        # connected. Never queued; run_async.py raises the limit under gevent.
+        'stream': {
+            'limit': int(os.getenv('SSE_MAX_STREAMS', 2)),
+            'queue': 0,
+            'timeout': 0,
+        },
+    }
+    app.config['ADMISSION_RETRY_AFTER_SECONDS'] = int(os.getenv('ADMISSION_RETRY_AFTER_SECONDS', 5))
+
+    # --- Real-time Admin Feed Configuration ---
+    # Seconds between keep-alive frames on idle Server-Sent Events connections
+    app.config['SSE_HEARTBEAT_SECONDS'] = int(os.getenv('SSE_HEARTBEAT_SECONDS', 15))
+    # Lifetime of the stream-only tokens passed in the /admin/stream query string
+    app.config['SSE_TOKEN_TTL_SECONDS'] = int(os.getenv('SSE_TOKEN_TTL_SECONDS', 60))
+
+    # --- Export Configuration ---
+    # Number of documents fetched per Firestore page while streaming exports
+    app.config['EXPORT_PAGE_SIZE'] = int(os.getenv('EXPORT_PAGE_SIZE', 500))
+
     # --- Cloudinary Configuration ---
     # Initializes the Cloudinary library with credentials from the .env file.
     # This allows the application to upload and manage media files.
@@ -38,6 +111,27 @@ def create_app():
         secure=True # Ensures all URLs are generated with HTTPS
     )
     
+    # --- Portfolio Rendition Configuration ---
+    # Responsive thumbnail widths/formats and video derivatives generated eagerly at upload
+    app.config['PORTFOLIO_IMAGE_WIDTHS'] = [int(w) for w in os.getenv('PORTFOLIO_IMAGE_WIDTHS', '320,640,1024,1600').split(',')]
+    app.config['PORTFOLIO_IMAGE_FORMATS'] = [f.strip() for f in os.getenv('PORTFOLIO_IMAGE_FORMATS', 'avif,webp').split(',')]
+    app.config['PORTFOLIO_VIDEO_PREVIEW_WIDTH'] = int(os.getenv('PORTFOLIO_VIDEO_PREVIEW_WIDTH', 480))
+    app.config['PORTFOLIO_POSTER_WIDTH'] = int(os.getenv('PORTFOLIO_POSTER_WIDTH', 1280))
+    
+    # --- Media Cleanup Queue Configuration ---
+    app.config['MEDIA_CLEANUP_BATCH_SIZE'] = int(os.getenv('MEDIA_CLEANUP_BATCH_SIZE', 100))
+    app.config['MEDIA_CLEANUP_MAX_ATTEMPTS'] = int(os.getenv('MEDIA_CLEANUP_MAX_ATTEMPTS', 8))
+    # Base delay before a failed deletion is retried; doubles with each attempt
+    app.config['MEDIA_CLEANUP_BACKOFF_SECONDS'] = int(os.getenv('MEDIA_CLEANUP_BACKOFF_SECONDS', 60))
+    # Longest the worker sleeps between checks while retries are outstanding
+    app.config['MEDIA_CLEANUP_IDLE_POLL_SECONDS'] = int(os.getenv('MEDIA_CLEANUP_IDLE_POLL_SECONDS', 900))
+
+    # --- Archival Configuration ---
+    # Records older than ARCHIVE_MAX_AGE_DAYS are archived; read contacts and
+    # completed inquiries are archived once older than ARCHIVE_TERMINAL_AGE_DAYS
+    app.config['ARCHIVE_MAX_AGE_DAYS'] = int(os.getenv('ARCHIVE_MAX_AGE_DAYS', 365))
+    app.config['ARCHIVE_TERMINAL_AGE_DAYS'] = int(os.getenv('ARCHIVE_TERMINAL_AGE_DAYS', 30))
+
     # --- CORS (Cross-Origin Resource Sharing) Configuration ---
     # Allows your React frontend to make requests to this Flask backend.
     origins = [
@@ -62,4 +156,12 @@ def create_app():
     app.register_blueprint(auth_blueprint, url_prefix='/auth')
     app.register_blueprint(admin_blueprint, url_prefix='/admin')
 
+    # --- Register CLI Commands (flask --app run <command>) ---
+    from app.commands import register_commands
+    register_commands(app)
+
+    # --- Background Media Cleanup ---
+    from app.media_cleanup import init_media_cleanup
+    init_media_cleanup(app)
+
     return app
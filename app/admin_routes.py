@@ -1,8 +1,22 @@
-from flask import Blueprint, request, jsonify, current_app
-from app.models import Contact, ProjectInquiry, Portfolio, AdminUser, Subscriber
-from app.auth import token_required
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
+from app.models import Contact, ProjectInquiry, Portfolio, AdminUser, Subscriber, SubscriberImport, Campaign, INQUIRY_FILTER_FIELDS
+from app.auth import token_required, stream_token_required
+from app.concurrency import run_concurrently
+from app.admission import limit_concurrency, admission_metrics
+from app import analytics
+from app.realtime import change_feed, encode_event
+from app.subscriber_import import read_import, start_import_job
+from app.campaigns import campaign_progress, start_campaign_worker, requeue_failed
+from app.exports import EXPORTS, EXPORT_FORMATS, parse_date, build_export_query, generate_rows, gzip_stream, encode_stream
+from datetime import datetime, timedelta
+import queue
 from app.email_service import send_email_notification
-from app.cloudinary_service import upload_media, delete_media
+from app.media_cleanup import enqueue_media_deletion
+from app import archive
+from app.cloudinary_service import (
+    upload_media, parse_media_url, image_eager_transformations, video_eager_transformations,
+    build_image_renditions, build_video_renditions
+)
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -14,14 +28,20 @@ admin_bp = Blueprint('admin', __name__)
 def get_dashboard_stats(current_admin):
     """Provides summary statistics for the dashboard homepage."""
     try:
-        contacts_count = len(Contact.get_all())
-        inquiries_count = len(ProjectInquiry.get_all())
-        portfolio_count = len(Portfolio.get_all())
-        subscribers_count = len(Subscriber.get_all()) # Added subscriber count
-        
-        admins_count = 0
-        if current_admin.get('is_super_admin', False):
-            admins_count = len(AdminUser.get_all())
+        # The queries are independent, so run them side by side
+        is_super_admin = current_admin.get('is_super_admin', False)
+        contacts, inquiries, portfolio, subscribers, admins = run_concurrently(
+            Contact.get_all,
+            ProjectInquiry.get_all,
+            Portfolio.get_all,
+            Subscriber.get_all,
+            AdminUser.get_all if is_super_admin else list
+        )
+        contacts_count = len(contacts)
+        inquiries_count = len(inquiries)
+        portfolio_count = len(portfolio)
+        subscribers_count = len(subscribers) # Added subscriber count
+        admins_count = len(admins)
 
         stats = {
             "contactsCount": contacts_count,
@@ -34,6 +54,101 @@ def get_dashboard_stats(current_admin):
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# ==================================================
+# Analytics (pre-aggregated daily buckets)
+# ==================================================
+@admin_bp.route('/analytics', methods=['GET'])
+@token_required
+def get_analytics(current_admin):
+    """
+    Time series for charts. Query params: metric (inquiries|contacts|subscribers),
+    from/to (YYYY-MM-DD, default last 30 days), interval (day|week) and, for
+    inquiries, dimension (domain|projectType|budget|clientType|country|status).
+    """
+    try:
+        metric = request.args.get('metric', 'inquiries')
+        if metric not in analytics.METRICS:
+            return jsonify({"error": f"Metric must be one of: {', '.join(analytics.METRICS)}"}), 400
+
+        interval = request.args.get('interval', 'day')
+        if interval not in ('day', 'week'):
+            return jsonify({"error": "Interval must be day or week"}), 400
+
+        dimension = request.args.get('dimension')
+        if dimension and dimension not in analytics.METRICS[metric]:
+            return jsonify({"error": f"Unsupported dimension for {metric}"}), 400
+
+        try:
+            end = parse_date(request.args['to']) if request.args.get('to') else datetime.now()
+            start = parse_date(request.args['from']) if request.args.get('from') else end - timedelta(days=29)
+        except ValueError:
+            return jsonify({"error": "Dates must use the YYYY-MM-DD format"}), 400
+        if start > end or (end - start).days >= analytics.MAX_RANGE_DAYS:
+            return jsonify({"error": f"Range must be positive and at most {analytics.MAX_RANGE_DAYS} days"}), 400
+
+        series = analytics.get_series(metric, start, end, interval, dimension)
+        return jsonify({
+            "data": {
+                "metric": metric,
+                "interval": interval,
+                "dimension": dimension,
+                "from": analytics.day_key(start),
+                "to": analytics.day_key(end),
+                "series": series
+            },
+            "status": "success"
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# ==================================================
+# Real-time Change Feed (Server-Sent Events)
+# ==================================================
+@admin_bp.route('/stream', methods=['GET'])
+@stream_token_required
+@limit_concurrency('stream')
+def stream_changes(current_admin):
+    """
+    Streams add/modify/remove events for contacts, inquiries, subscribers and
+    portfolio items, plus updated counters, so the dashboard doesn't have to poll.
+    Connections are capped per process (SSE_MAX_STREAMS); over the cap the
+    client gets a 503 and should fall back to polling.
+    """
+    heartbeat = current_app.config['SSE_HEARTBEAT_SECONDS']
+    client = change_feed.subscribe()
+
+    def generate():
+        try:
+            yield "retry: 5000\n\n"
+            yield encode_event('counters', change_feed.snapshot_counts())
+            while True:
+                try:
+                    yield client.get(timeout=heartbeat)
+                except queue.Empty:
+                    if not change_feed.is_subscribed(client):
+                        break
+                    # Comment frames keep proxies from closing an idle connection
+                    yield ": keep-alive\n\n"
+        finally:
+            change_feed.unsubscribe(client)
+
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+# ==================================================
+# Admission Control Metrics
+# ==================================================
+@admin_bp.route('/metrics/admission', methods=['GET'])
+@token_required
+def get_admission_metrics(current_admin):
+    """Per endpoint class: limit, in-flight, queued, admitted/shed counts and queue wait (this process)."""
+    try:
+        return jsonify({"data": admission_metrics(), "status": "success"})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 # ==================================================
 # Contacts Management
 # ==================================================
@@ -74,9 +189,32 @@ def delete_contact(current_admin, contact_id):
 @admin_bp.route('/inquiries', methods=['GET'])
 @token_required
 def get_inquiries(current_admin):
+    """
+    Lists inquiries newest first. Optional query params: status, domain,
+    projectType, budget, country, from/to (YYYY-MM-DD), q (prefix of name,
+    email or company), limit (max 200) and cursor (nextCursor of the previous page).
+    """
     try:
-        inquiries = ProjectInquiry.get_all()
-        return jsonify({"data": inquiries, "status": "success"})
+        filters = {field: request.args[field] for field in INQUIRY_FILTER_FIELDS if request.args.get(field)}
+        try:
+            start = parse_date(request.args['from']) if request.args.get('from') else None
+            end = parse_date(request.args['to']) + timedelta(days=1) if request.args.get('to') else None
+        except ValueError:
+            return jsonify({"error": "Dates must use the YYYY-MM-DD format"}), 400
+
+        limit = max(1, min(request.args.get('limit', 100, type=int), 200))
+        try:
+            inquiries, next_cursor = ProjectInquiry.search(
+                filters=filters,
+                text=request.args.get('q'),
+                start=start,
+                end=end,
+                limit=limit,
+                cursor=request.args.get('cursor')
+            )
+        except ValueError:
+            return jsonify({"error": "Invalid cursor; start again from the first page"}), 400
+        return jsonify({"data": inquiries, "nextCursor": next_cursor, "status": "success"})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -92,7 +230,7 @@ def update_inquiry_status(current_admin, inquiry_id):
         if not data or 'status' not in data:
             return jsonify({"error": "Status is required"}), 400
         
-        ProjectInquiry.update_status(inquiry_id, data['status'])
+        ProjectInquiry.update_status(inquiry_id, data['status'], inquiry=inquiry)
         
         if data['status'] in ['contacted', 'in_progress', 'completed']:
             send_email_notification(
@@ -109,9 +247,17 @@ def update_inquiry_status(current_admin, inquiry_id):
 @token_required
 def delete_inquiry(current_admin, inquiry_id):
     try:
-        if not ProjectInquiry.get_by_id(inquiry_id):
+        inquiry = ProjectInquiry.get_by_id(inquiry_id)
+        if not inquiry:
             return jsonify({"error": "Inquiry not found"}), 404
         ProjectInquiry.delete(inquiry_id)
+
+        # Release the attachments' registry references; the cleanup worker
+        # destroys each file once no other inquiry uses it
+        for url in inquiry.get('attached_files') or []:
+            media = parse_media_url(url)
+            if media:
+                enqueue_media_deletion(public_id=media[0], resource_type=media[1])
         return jsonify({"message": "Inquiry deleted successfully", "status": "success"})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -130,6 +276,7 @@ def get_admin_portfolio(current_admin):
 
 @admin_bp.route('/portfolio', methods=['POST'])
 @token_required
+@limit_concurrency('upload')
 def create_portfolio_item(current_admin):
     try:
         data = request.form.to_dict()
@@ -143,10 +290,12 @@ def create_portfolio_item(current_admin):
         if not thumbnail or not video:
             return jsonify({"error": "A thumbnail and video file are required"}), 400
 
-        thumb_upload = upload_media(thumbnail, folder="portfolio_thumbnails")
+        thumb_upload, video_upload = run_concurrently(
+            lambda: upload_media(thumbnail, folder="portfolio_thumbnails", eager=image_eager_transformations()),
+            lambda: upload_media(video, folder="portfolio_videos", eager=video_eager_transformations()),
+            pool='upload'
+        )
         if not thumb_upload: return jsonify({"error": "Failed to upload thumbnail"}), 500
-
-        video_upload = upload_media(video, folder="portfolio_videos")
         if not video_upload: return jsonify({"error": "Failed to upload video"}), 500
 
         final_data = {**data}
@@ -154,6 +303,10 @@ def create_portfolio_item(current_admin):
         final_data['thumbnail_public_id'] = thumb_upload.get('public_id')
         final_data['videoUrl'] = video_upload.get('secure_url')
         final_data['video_public_id'] = video_upload.get('public_id')
+        final_data['renditions'] = {
+            'thumbnail': build_image_renditions(thumb_upload.get('public_id')),
+            'video': build_video_renditions(video_upload.get('public_id'))
+        }
         final_data['technologies'] = [tech.strip() for tech in data.get('technologies', '').split(',')]
 
         portfolio_id = Portfolio.create(final_data)
@@ -163,6 +316,7 @@ def create_portfolio_item(current_admin):
 
 @admin_bp.route('/portfolio/<portfolio_id>', methods=['PUT'])
 @token_required
+@limit_concurrency('upload')
 def update_portfolio_item(current_admin, portfolio_id):
     try:
         portfolio_item = Portfolio.get_by_id(portfolio_id)
@@ -173,21 +327,30 @@ def update_portfolio_item(current_admin, portfolio_id):
         thumbnail = request.files.get('thumbnailFile')
         video = request.files.get('videoFile')
 
+        # Upload the replacement before releasing the old file, so re-uploading
+        # the same file reuses the registered asset instead of destroying it
+        renditions = dict(portfolio_item.get('renditions') or {})
+
         if thumbnail:
-            if portfolio_item.get('thumbnail_public_id'):
-                delete_media(portfolio_item['thumbnail_public_id'], resource_type="image")
-            thumb_upload = upload_media(thumbnail, folder="portfolio_thumbnails")
+            thumb_upload = upload_media(thumbnail, folder="portfolio_thumbnails", eager=image_eager_transformations())
             if not thumb_upload: return jsonify({"error": "Failed to upload new thumbnail"}), 500
+            if portfolio_item.get('thumbnail_public_id'):
+                enqueue_media_deletion(portfolio_item['thumbnail_public_id'], resource_type="image")
             data['thumbnailUrl'] = thumb_upload.get('secure_url')
             data['thumbnail_public_id'] = thumb_upload.get('public_id')
+            renditions['thumbnail'] = build_image_renditions(thumb_upload.get('public_id'))
 
         if video:
-            if portfolio_item.get('video_public_id'):
-                delete_media(portfolio_item['video_public_id'], resource_type="video")
-            video_upload = upload_media(video, folder="portfolio_videos")
+            video_upload = upload_media(video, folder="portfolio_videos", eager=video_eager_transformations())
             if not video_upload: return jsonify({"error": "Failed to upload new video"}), 500
+            if portfolio_item.get('video_public_id'):
+                enqueue_media_deletion(portfolio_item['video_public_id'], resource_type="video")
             data['videoUrl'] = video_upload.get('secure_url')
             data['video_public_id'] = video_upload.get('public_id')
+            renditions['video'] = build_video_renditions(video_upload.get('public_id'))
+
+        if thumbnail or video:
+            data['renditions'] = renditions
 
         if 'technologies' in data:
             data['technologies'] = [tech.strip() for tech in data.get('technologies', '').split(',')]
@@ -205,13 +368,15 @@ def delete_portfolio_item(current_admin, portfolio_id):
         if not portfolio_item:
             return jsonify({"error": "Portfolio item not found"}), 404
         
+        Portfolio.delete(portfolio_id)
+
+        # Media is removed by the cleanup worker; anything missed here is
+        # picked up by the orphan reconciliation job
         if portfolio_item.get('thumbnail_public_id'):
-            delete_media(public_id=portfolio_item['thumbnail_public_id'], resource_type="image")
+            enqueue_media_deletion(public_id=portfolio_item['thumbnail_public_id'], resource_type="image")
 
         if portfolio_item.get('video_public_id'):
-            delete_media(public_id=portfolio_item['video_public_id'], resource_type="video")
-
-        Portfolio.delete(portfolio_id)
+            enqueue_media_deletion(public_id=portfolio_item['video_public_id'], resource_type="video")
         return jsonify({"message": "Portfolio item deleted", "status": "success"})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -266,6 +431,52 @@ def get_subscribers(current_admin):
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@admin_bp.route('/subscribers/import', methods=['POST'])
+@token_required
+@limit_concurrency('bulk')
+def bulk_import_subscribers(current_admin):
+    """
+    Imports subscribers from an uploaded CSV file (form field 'file').
+    Optional form fields: suppress_welcome (true/false), source (e.g. an event name).
+    The file is validated here and imported in the background; poll
+    /admin/subscribers/import/<id> for progress and the final summary.
+    Welcome emails are queued as a campaign and sent in the background.
+    """
+    try:
+        upload = request.files.get('file')
+        if not upload or not upload.filename:
+            return jsonify({"error": "A CSV file is required"}), 400
+
+        suppress_welcome = request.form.get('suppress_welcome', 'false').lower() in ('true', '1', 'yes')
+        emails, summary = read_import(upload.stream)
+        import_id = start_import_job(
+            emails,
+            summary,
+            send_welcome=not suppress_welcome,
+            source=request.form.get('source') or None,
+            created_by=current_admin.get('email')
+        )
+        return jsonify({
+            "message": "Subscriber import started",
+            "id": import_id,
+            "data": summary,
+            "status": "success"
+        }), 202
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@admin_bp.route('/subscribers/import/<import_id>', methods=['GET'])
+@token_required
+def get_subscriber_import(current_admin, import_id):
+    """Status (running/completed/failed) and summary of a subscriber import."""
+    try:
+        subscriber_import = SubscriberImport.get_by_id(import_id)
+        if not subscriber_import:
+            return jsonify({"error": "Import not found"}), 404
+        return jsonify({"data": subscriber_import, "status": "success"})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @admin_bp.route('/subscribers/<subscriber_id>', methods=['DELETE'])
 @token_required
 def delete_subscriber(current_admin, subscriber_id):
@@ -281,3 +492,223 @@ def delete_subscriber(current_admin, subscriber_id):
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# ==================================================
+# Newsletter Campaigns
+# ==================================================
+@admin_bp.route('/campaigns', methods=['GET'])
+@token_required
+def get_campaigns(current_admin):
+    try:
+        campaigns = [campaign_progress(c) for c in Campaign.get_all()]
+        return jsonify({"data": campaigns, "status": "success"})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@admin_bp.route('/campaigns', methods=['POST'])
+@token_required
+@limit_concurrency('bulk')
+def create_campaign(current_admin):
+    """Creates a campaign and snapshots the current subscribers as its recipients."""
+    try:
+        data = request.get_json()
+        if not data or not data.get('subject') or not data.get('message'):
+            return jsonify({"error": "Subject and message are required"}), 400
+
+        campaign_id = Campaign.create({
+            'subject': data['subject'],
+            'message': data['message'],
+            'created_by': current_admin.get('email')
+        })
+        total = Campaign.snapshot_recipients(campaign_id)
+        return jsonify({
+            "message": "Campaign created",
+            "id": campaign_id,
+            "totalRecipients": total,
+            "status": "success"
+        }), 201
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@admin_bp.route('/campaigns/<campaign_id>', methods=['GET'])
+@token_required
+def get_campaign(current_admin, campaign_id):
+    try:
+        campaign = Campaign.get_by_id(campaign_id)
+        if not campaign:
+            return jsonify({"error": "Campaign not found"}), 404
+        return jsonify({"data": campaign_progress(campaign), "status": "success"})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@admin_bp.route('/campaigns/<campaign_id>/send', methods=['POST'])
+@token_required
+def send_campaign(current_admin, campaign_id):
+    """Starts or resumes sending on a background worker."""
+    try:
+        campaign = Campaign.get_by_id(campaign_id)
+        if not campaign:
+            return jsonify({"error": "Campaign not found"}), 404
+        if campaign.get('status') not in ('ready', 'paused', 'sending'):
+            return jsonify({"error": f"Campaign cannot be sent while {campaign.get('status')}"}), 409
+
+        start_campaign_worker(campaign_id)
+        return jsonify({"message": "Campaign sending started", "status": "success"}), 202
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@admin_bp.route('/campaigns/<campaign_id>/pause', methods=['POST'])
+@token_required
+def pause_campaign(current_admin, campaign_id):
+    try:
+        campaign = Campaign.get_by_id(campaign_id)
+        if not campaign:
+            return jsonify({"error": "Campaign not found"}), 404
+        if campaign.get('status') != 'sending':
+            return jsonify({"error": "Only a sending campaign can be paused"}), 409
+
+        # The worker notices the status change at its next checkpoint
+        Campaign.update(campaign_id, {'status': 'paused', 'lease_owner': None})
+        return jsonify({"message": "Campaign paused", "status": "success"})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@admin_bp.route('/campaigns/<campaign_id>/requeue-failed', methods=['POST'])
+@token_required
+def requeue_failed_recipients(current_admin, campaign_id):
+    """Returns failed recipients to pending; send the campaign again to retry them."""
+    try:
+        campaign = Campaign.get_by_id(campaign_id)
+        if not campaign:
+            return jsonify({"error": "Campaign not found"}), 404
+        if campaign.get('status') == 'sending':
+            return jsonify({"error": "Pause the campaign before requeueing failed recipients"}), 409
+
+        requeued = requeue_failed(campaign_id)
+        return jsonify({"message": f"{requeued} failed recipient(s) requeued", "requeued": requeued, "status": "success"})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@admin_bp.route('/campaigns/<campaign_id>/recipients', methods=['GET'])
+@token_required
+def get_campaign_recipients(current_admin, campaign_id):
+    """Lists recipients, optionally filtered by delivery state (pending/sending/sent/failed/unknown)."""
+    try:
+        if not Campaign.get_by_id(campaign_id):
+            return jsonify({"error": "Campaign not found"}), 404
+        limit = min(request.args.get('limit', 100, type=int), 500)
+        recipients = Campaign.get_recipients(campaign_id, state=request.args.get('state'), limit=limit)
+        return jsonify({"data": recipients, "status": "success"})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# ==================================================
+# Archived Contacts & Inquiries
+# ==================================================
+@admin_bp.route('/archive/<kind>', methods=['GET'])
+@token_required
+def search_archive(current_admin, kind):
+    """
+    Searches archived contacts or inquiries. Query params: q (name/email/company
+    prefix), from/to (YYYY-MM-DD), limit (max 200), cursor, plus 'read' for
+    contacts or status/domain/projectType/budget/country for inquiries.
+    """
+    try:
+        if kind not in archive.ARCHIVES:
+            return jsonify({"error": "Archive must be contacts or inquiries"}), 404
+
+        filters = {}
+        for field in archive.ARCHIVES[kind]['filters']:
+            value = request.args.get(field)
+            if value:
+                filters[field] = value.lower() == 'true' if field == 'read' else value
+
+        try:
+            start = parse_date(request.args['from']) if request.args.get('from') else None
+            end = parse_date(request.args['to']) + timedelta(days=1) if request.args.get('to') else None
+        except ValueError:
+            return jsonify({"error": "Dates must use the YYYY-MM-DD format"}), 400
+
+        limit = max(1, min(request.args.get('limit', 50, type=int), 200))
+        try:
+            records, next_cursor = archive.search_archive(
+                kind,
+                filters=filters,
+                text=request.args.get('q'),
+                start=start,
+                end=end,
+                limit=limit,
+                cursor=request.args.get('cursor')
+            )
+        except ValueError:
+            return jsonify({"error": "Invalid cursor; start again from the first page"}), 400
+        return jsonify({"data": records, "nextCursor": next_cursor, "status": "success"})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@admin_bp.route('/archive/<kind>/<record_id>', methods=['GET'])
+@token_required
+def get_archived_record(current_admin, kind, record_id):
+    try:
+        if kind not in archive.ARCHIVES:
+            return jsonify({"error": "Archive must be contacts or inquiries"}), 404
+        record = archive.get_archived(kind, record_id)
+        if not record:
+            return jsonify({"error": "Archived record not found"}), 404
+        return jsonify({"data": record, "status": "success"})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@admin_bp.route('/archive/<kind>/<record_id>/restore', methods=['POST'])
+@token_required
+def restore_archived_record(current_admin, kind, record_id):
+    try:
+        if kind not in archive.ARCHIVES:
+            return jsonify({"error": "Archive must be contacts or inquiries"}), 404
+        if not archive.restore_record(kind, record_id):
+            return jsonify({"error": "Archived record not found"}), 404
+        return jsonify({"message": "Record restored", "id": record_id, "status": "success"})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# ==================================================
+# Streaming Exports
+# ==================================================
+@admin_bp.route('/export/<dataset>', methods=['GET'])
+@token_required
+@limit_concurrency('bulk')
+def export_dataset(current_admin, dataset):
+    """
+    Streams subscribers, contacts or inquiries as CSV or NDJSON.
+    Query params: format (csv|ndjson), from/to (YYYY-MM-DD), fields (comma-separated).
+    """
+    try:
+        if dataset not in EXPORTS:
+            return jsonify({"error": f"Unknown export. Choose one of: {', '.join(EXPORTS)}"}), 404
+
+        export_format = request.args.get('format', 'csv').lower()
+        if export_format not in EXPORT_FORMATS:
+            return jsonify({"error": "Format must be csv or ndjson"}), 400
+
+        try:
+            start = parse_date(request.args['from']) if request.args.get('from') else None
+            end = parse_date(request.args['to']) if request.args.get('to') else None
+        except ValueError:
+            return jsonify({"error": "Dates must use the YYYY-MM-DD format"}), 400
+
+        fields = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()] or None
+
+        query = build_export_query(dataset, start, end, fields)
+        rows = generate_rows(dataset, export_format, query, fields, current_app.config['EXPORT_PAGE_SIZE'])
+
+        use_gzip = 'gzip' in request.headers.get('Accept-Encoding', '').lower()
+        body = gzip_stream(rows) if use_gzip else encode_stream(rows)
+
+        response = Response(stream_with_context(body), mimetype=EXPORT_FORMATS[export_format])
+        filename = f"{dataset}-{datetime.now().strftime('%Y%m%d')}.{export_format}"
+        response.headers['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response.headers['Vary'] = 'Accept-Encoding'
+        if use_gzip:
+            response.headers['Content-Encoding'] = 'gzip'
+        return response
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
@@ -0,0 +1,131 @@
+import threading
+import time
+from functools import wraps
+from flask import current_app, jsonify, make_response
+
+
+class AdmissionGate:
+    """
+    Caps how many requests of one endpoint class run at once in this process.
+    Requests over the limit wait in a short bounded queue; when the queue is
+    full or the wait times out they are shed instead of tying up a worker.
+    """
+
+    def __init__(self, name, limit, max_queue, timeout):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(limit)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.shed = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def acquire(self):
+        """Returns True once a slot is held, False if the request should be shed."""
+        if self._slots.acquire(blocking=False):
+            self._record_admitted(0.0)
+            return True
+
+        with self._lock:
+            if self.waiting >= self.max_queue:
+                self.shed += 1
+                return False
+            self.waiting += 1
+
+        started = time.monotonic()
+        acquired = self._slots.acquire(timeout=self.timeout)
+        waited = time.monotonic() - started
+        with self._lock:
+            self.waiting -= 1
+            if not acquired:
+                self.shed += 1
+        if acquired:
+            self._record_admitted(waited)
+        return acquired
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def _record_admitted(self, waited):
+        with self._lock:
+            self.in_flight += 1
+            self.admitted += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'limit': self.limit,
+                'maxQueue': self.max_queue,
+                'inFlight': self.in_flight,
+                'waiting': self.waiting,
+                'admitted': self.admitted,
+                'shed': self.shed,
+                'avgQueueWaitMs': round(self.total_wait / self.admitted * 1000, 2) if self.admitted else 0,
+                'maxQueueWaitMs': round(self.max_wait * 1000, 2),
+            }
+
+
+_gates = {}
+_gates_lock = threading.Lock()
+
+
+def get_gate(endpoint_class):
+    with _gates_lock:
+        if endpoint_class not in _gates:
+            settings = current_app.config['ADMISSION_LIMITS'][endpoint_class]
+            _gates[endpoint_class] = AdmissionGate(
+                endpoint_class,
+                limit=settings['limit'],
+                max_queue=settings['queue'],
+                timeout=settings['timeout']
+            )
+        return _gates[endpoint_class]
+
+
+def admission_metrics():
+    """Per-class counters for the admin metrics endpoint."""
+    with _gates_lock:
+        gates = dict(_gates)
+    return {name: gate.snapshot() for name, gate in gates.items()}
+
+
+def limit_concurrency(endpoint_class):
+    """
+    Decorator that admits a request only when its endpoint class has capacity,
+    otherwise responds 503 with Retry-After. Streamed responses keep their
+    slot until the stream is closed.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            gate = get_gate(endpoint_class)
+            if not gate.acquire():
+                current_app.logger.warning(f"Shedding {endpoint_class} request: {gate.in_flight} in flight, {gate.waiting} waiting")
+                response = jsonify({"error": "Server is busy, please retry shortly", "status": "busy"})
+                response.status_code = 503
+                response.headers['Retry-After'] = str(current_app.config['ADMISSION_RETRY_AFTER_SECONDS'])
+                return response
+
+            try:
+                response = make_response(f(*args, **kwargs))
+            except Exception:
+                gate.release()
+                raise
+
+            if response.is_streamed:
+                response.call_on_close(gate.release)
+            else:
+                gate.release()
+            return response
+
+        return decorated
+    return decorator
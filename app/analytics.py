@@ -0,0 +1,178 @@
+from collections import defaultdict
+from datetime import datetime, timedelta
+from firebase_admin import firestore
+from app.firebase import get_db
+
+db = get_db()
+
+# Inquiry fields broken down in the daily buckets, plus the workflow status
+INQUIRY_DIMENSIONS = ('domain', 'projectType', 'budget', 'clientType', 'country')
+METRICS = {
+    'inquiries': INQUIRY_DIMENSIONS + ('status',),
+    'contacts': (),
+    'subscribers': (),
+}
+
+# Longest range a single /admin/analytics request may cover
+MAX_RANGE_DAYS = 366
+
+
+def day_key(moment=None):
+    """Bucket key for a timestamp, e.g. '2025-03-14'."""
+    return (moment or datetime.now()).strftime('%Y-%m-%d')
+
+
+def _bucket_ref(metric, day):
+    # analytics/<metric>/daily/<YYYY-MM-DD>
+    return db.collection('analytics').document(metric).collection('daily').document(day)
+
+
+def _dimension_value(value):
+    value = str(value).strip() if value is not None else ''
+    return value[:100] or 'unknown'
+
+
+# --- Incremental updates: each adds its bucket write to the caller's batch ---
+
+def add_inquiry_rollup(batch, inquiry_data):
+    day = day_key(inquiry_data['created_at'])
+    update = {
+        'date': day,
+        'total': firestore.Increment(1),
+        'by': {dim: {_dimension_value(inquiry_data.get(dim)): firestore.Increment(1)} for dim in INQUIRY_DIMENSIONS},
+        'status': {_dimension_value(inquiry_data.get('status')): firestore.Increment(1)},
+    }
+    batch.set(_bucket_ref('inquiries', day), update, merge=True)
+
+
+def add_inquiry_status_rollup(batch, inquiry, new_status):
+    """Moves an inquiry between status counters in the bucket of the day it arrived."""
+    old_status = _dimension_value(inquiry.get('status'))
+    new_status = _dimension_value(new_status)
+    if old_status == new_status or not inquiry.get('created_at'):
+        return
+    day = day_key(inquiry['created_at'])
+    batch.set(_bucket_ref('inquiries', day), {
+        'date': day,
+        'status': {old_status: firestore.Increment(-1), new_status: firestore.Increment(1)},
+    }, merge=True)
+
+
+def add_contact_rollup(batch, contact_data):
+    day = day_key(contact_data['created_at'])
+    batch.set(_bucket_ref('contacts', day), {'date': day, 'total': firestore.Increment(1)}, merge=True)
+
+
+def add_subscriber_rollup(batch, added=0, removed=0, moment=None):
+    day = day_key(moment)
+    update = {'date': day}
+    if added:
+        update['added'] = firestore.Increment(added)
+    if removed:
+        update['removed'] = firestore.Increment(removed)
+    batch.set(_bucket_ref('subscribers', day), update, merge=True)
+
+
+# --- Range queries over the bucket documents ---
+
+def _period_start(day, interval):
+    if interval == 'week':
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def get_series(metric, start, end, interval='day', dimension=None):
+    """
+    Aggregates daily buckets between start and end (inclusive dates) into
+    per-day or per-week (Monday-based) periods. Reads only bucket documents.
+    """
+    query = (db.collection('analytics').document(metric).collection('daily')
+             .where('date', '>=', day_key(start))
+             .where('date', '<=', day_key(end)))
+    buckets = {doc.id: doc.to_dict() for doc in query.stream()}
+
+    periods = {}
+    day = start.date() if isinstance(start, datetime) else start
+    last_day = end.date() if isinstance(end, datetime) else end
+    while day <= last_day:
+        key = _period_start(day, interval).isoformat()
+        period = periods.setdefault(key, {'period': key, 'total': 0, 'added': 0, 'removed': 0, 'breakdown': defaultdict(int)})
+        bucket = buckets.get(day.isoformat(), {})
+        period['total'] += bucket.get('total', 0)
+        period['added'] += bucket.get('added', 0)
+        period['removed'] += bucket.get('removed', 0)
+        if dimension:
+            values = bucket.get('status', {}) if dimension == 'status' else bucket.get('by', {}).get(dimension, {})
+            for value, count in values.items():
+                period['breakdown'][value] += count
+        day += timedelta(days=1)
+
+    series = []
+    for period in periods.values():
+        if metric == 'subscribers':
+            entry = {'period': period['period'], 'added': period['added'], 'removed': period['removed'],
+                     'net': period['added'] - period['removed']}
+        else:
+            entry = {'period': period['period'], 'total': period['total']}
+        if dimension:
+            entry['breakdown'] = dict(period['breakdown'])
+        series.append(entry)
+    return series
+
+
+# --- Backfill ---
+
+# Archived records still count towards the history they were created in
+BACKFILL_COLLECTIONS = {
+    'inquiries': ('project_inquiries', 'archived_inquiries'),
+    'contacts': ('contacts', 'archived_contacts'),
+}
+
+def backfill(metric):
+    """
+    Recomputes every daily bucket for a metric from the source collection
+    (plus its archive) and overwrites the stored buckets. Run it before relying on the charts, or to
+    repair drift; increments that land mid-run may be overwritten.
+    Returns the number of bucket documents written.
+    """
+    from app.models import iter_documents
+
+    buckets = defaultdict(lambda: {'total': 0, 'added': 0, 'by': defaultdict(lambda: defaultdict(int)), 'status': defaultdict(int)})
+    if metric == 'inquiries':
+        for collection in BACKFILL_COLLECTIONS[metric]:
+            query = db.collection(collection).order_by('created_at')
+            for doc in iter_documents(query):
+                data = doc.to_dict()
+                bucket = buckets[day_key(data['created_at'])]
+                bucket['total'] += 1
+                for dim in INQUIRY_DIMENSIONS:
+                    bucket['by'][dim][_dimension_value(data.get(dim))] += 1
+                bucket['status'][_dimension_value(data.get('status'))] += 1
+    elif metric == 'contacts':
+        for collection in BACKFILL_COLLECTIONS[metric]:
+            query = db.collection(collection).order_by('created_at').select(['created_at'])
+            for doc in iter_documents(query):
+                buckets[day_key(doc.get('created_at'))]['total'] += 1
+    elif metric == 'subscribers':
+        query = db.collection('subscribers').order_by('subscribed_at').select(['subscribed_at'])
+        for doc in iter_documents(query):
+            buckets[day_key(doc.get('subscribed_at'))]['added'] += 1
+    else:
+        raise ValueError(f"Unknown metric: {metric}")
+
+    batch = db.batch()
+    for written, (day, bucket) in enumerate(sorted(buckets.items()), start=1):
+        if metric == 'inquiries':
+            document = {'date': day, 'total': bucket['total'], 'status': dict(bucket['status']),
+                        'by': {dim: dict(values) for dim, values in bucket['by'].items()}}
+        elif metric == 'contacts':
+            document = {'date': day, 'total': bucket['total']}
+        else:
+            document = {'date': day, 'added': bucket['added']}
+        # Subscriber removals can't be reconstructed, so keep the recorded ones
+        batch.set(_bucket_ref(metric, day), document, merge=(metric == 'subscribers'))
+        if written % 500 == 0:
+            batch.commit()
+            batch = db.batch()
+    batch.commit()
+    return len(buckets)
@@ -0,0 +1,115 @@
+from datetime import datetime, timedelta
+from flask import current_app
+from app.firebase import get_db
+from app.models import iter_documents, search_documents, inquiry_search_tokens
+from app.utils import build_search_tokens
+
+db = get_db()
+
+# Live collection, archive collection, and the "terminal state" filter that
+# makes a record eligible early. Archived documents keep their IDs.
+ARCHIVES = {
+    'contacts': {
+        'collection': 'contacts',
+        'archive': 'archived_contacts',
+        'terminal': ('read', True),
+        'filters': ('read',),
+    },
+    'inquiries': {
+        'collection': 'project_inquiries',
+        'archive': 'archived_inquiries',
+        'terminal': ('status', 'completed'),
+        'filters': ('status', 'domain', 'projectType', 'budget', 'country'),
+    },
+}
+
+# Each archived record costs two writes (archive set + live delete)
+MOVES_PER_BATCH = 250
+
+
+def _archive_document(kind, data):
+    archived = {**data, 'archived_at': datetime.now()}
+    # Inquiries already carry search tokens; contacts get them so the archive is searchable
+    if kind == 'contacts':
+        archived['search_tokens'] = build_search_tokens(data.get('name'), data.get('email'))
+    elif 'search_tokens' not in archived:
+        archived['search_tokens'] = inquiry_search_tokens(data)
+    return archived
+
+
+def _eligible_documents(kind, now):
+    """
+    Yields live documents older than ARCHIVE_MAX_AGE_DAYS, then terminal ones
+    (read contacts, completed inquiries) older than ARCHIVE_TERMINAL_AGE_DAYS.
+    """
+    config = ARCHIVES[kind]
+    collection = db.collection(config['collection'])
+    max_age_cutoff = now - timedelta(days=current_app.config['ARCHIVE_MAX_AGE_DAYS'])
+    terminal_cutoff = now - timedelta(days=current_app.config['ARCHIVE_TERMINAL_AGE_DAYS'])
+
+    yield from iter_documents(collection.where('created_at', '<', max_age_cutoff).order_by('created_at'))
+
+    field, value = config['terminal']
+    terminal = (collection.where(field, '==', value)
+                .where('created_at', '<', terminal_cutoff)
+                .where('created_at', '>=', max_age_cutoff)
+                .order_by('created_at', direction='DESCENDING'))
+    yield from iter_documents(terminal)
+
+
+def archive_records(kind, dry_run=False):
+    """
+    Moves eligible records into the archive collection. Each batch writes the
+    archive copies and deletes the live documents atomically, so a record is
+    never in both or neither. Returns the number of records archived.
+    """
+    config = ARCHIVES[kind]
+    archive = db.collection(config['archive'])
+    moved = 0
+    batch = db.batch()
+    for doc in _eligible_documents(kind, datetime.now()):
+        moved += 1
+        if dry_run:
+            continue
+        batch.set(archive.document(doc.id), _archive_document(kind, doc.to_dict()))
+        batch.delete(doc.reference)
+        if moved % MOVES_PER_BATCH == 0:
+            batch.commit()
+            batch = db.batch()
+    if not dry_run:
+        batch.commit()
+    return moved
+
+
+def get_archived(kind, record_id):
+    snapshot = db.collection(ARCHIVES[kind]['archive']).document(record_id).get()
+    if not snapshot.exists:
+        return None
+    record = {'id': snapshot.id, **snapshot.to_dict()}
+    record.pop('search_tokens', None)
+    return record
+
+
+def restore_record(kind, record_id):
+    """Moves an archived record back into its live collection. Returns False if not archived."""
+    config = ARCHIVES[kind]
+    archive_ref = db.collection(config['archive']).document(record_id)
+    snapshot = archive_ref.get()
+    if not snapshot.exists:
+        return False
+
+    data = snapshot.to_dict()
+    data.pop('archived_at', None)
+    if kind == 'contacts':
+        data.pop('search_tokens', None)
+
+    batch = db.batch()
+    batch.set(db.collection(config['collection']).document(record_id), data)
+    batch.delete(archive_ref)
+    batch.commit()
+    return True
+
+
+def search_archive(kind, filters=None, text=None, start=None, end=None, limit=50, cursor=None):
+    """Same filtering and prefix search as the live inquiry list, over the archive."""
+    return search_documents(ARCHIVES[kind]['archive'], filters, text, start, end, limit, cursor)
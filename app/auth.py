@@ -7,30 +7,66 @@ from app.models import AdminUser
 
 auth = Blueprint('auth', __name__)
 
+# Scope carried by the short-lived tokens issued for /admin/stream
+STREAM_SCOPE = 'stream'
+
+def _authenticate(token, scope=None):
+    """
+    Resolves a bearer token to an admin record. Only tokens issued for `scope`
+    are accepted; regular login tokens have no scope.
+    Returns (admin, None) on success or (None, error_response) on failure.
+    """
+    if not token:
+        return None, (jsonify({'error': 'Token is missing'}), 401)
+
+    try:
+        if token.startswith('Bearer '):
+            token = token[7:]
+
+        data = jwt.decode(token, current_app.config['JWT_SECRET'], algorithms=['HS256'])
+        if data.get('scope') != scope:
+            return None, (jsonify({'error': 'Token is invalid or expired'}), 401)
+        admin_id = data['admin_id']
+        
+        # Fetch user from Firestore database
+        current_admin = AdminUser.get_by_id(admin_id)
+
+        if not current_admin:
+            return None, (jsonify({'error': 'Invalid token user'}), 401)
+
+    except (jwt.ExpiredSignatureError, jwt.InvalidTokenError):
+        return None, (jsonify({'error': 'Token is invalid or expired'}), 401)
+    except Exception as e:
+        return None, (jsonify({'error': 'Unexpected error', 'details': str(e)}), 500)
+
+    return current_admin, None
+
 def token_required(f):
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = request.headers.get('Authorization')
-        if not token:
-            return jsonify({'error': 'Token is missing'}), 401
+        current_admin, error = _authenticate(request.headers.get('Authorization'))
+        if error:
+            return error
 
-        try:
-            if token.startswith('Bearer '):
-                token = token[7:]
-
-            data = jwt.decode(token, current_app.config['JWT_SECRET'], algorithms=['HS256'])
-            admin_id = data['admin_id']
-            
-            # Fetch user from Firestore database
-            current_admin = AdminUser.get_by_id(admin_id)
+        return f(current_admin, *args, **kwargs)
 
-            if not current_admin:
-                return jsonify({'error': 'Invalid token user'}), 401
+    return decorated
 
-        except (jwt.ExpiredSignatureError, jwt.InvalidTokenError):
-            return jsonify({'error': 'Token is invalid or expired'}), 401
-        except Exception as e:
-            return jsonify({'error': 'Unexpected error', 'details': str(e)}), 500
+def stream_token_required(f):
+    """
+    Same as token_required, but also accepts a stream token (see /auth/stream-token)
+    as a `token` query parameter, since browser EventSource connections cannot
+    set headers. The login token itself is never accepted in the URL, where
+    access logs and proxies would record it.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if request.headers.get('Authorization'):
+            current_admin, error = _authenticate(request.headers.get('Authorization'))
+        else:
+            current_admin, error = _authenticate(request.args.get('token'), scope=STREAM_SCOPE)
+        if error:
+            return error
 
         return f(current_admin, *args, **kwargs)
 
@@ -73,6 +109,28 @@ def login():
         return jsonify({"error": str(e)}), 500
 
 
+@auth.route('/stream-token', methods=['POST'])
+@token_required
+def issue_stream_token(current_admin):
+    """
+    Issues a short-lived token that only opens the /admin/stream change feed.
+    It is checked when the connection opens, so fetch a fresh one before each
+    (re)connect rather than reusing it.
+    """
+    try:
+        ttl = current_app.config['SSE_TOKEN_TTL_SECONDS']
+        token = jwt.encode({
+            'admin_id': current_admin['id'],
+            'scope': STREAM_SCOPE,
+            'exp': datetime.datetime.utcnow() + datetime.timedelta(seconds=ttl)
+        }, current_app.config['JWT_SECRET'], algorithm='HS256')
+
+        return jsonify({"token": token, "expiresIn": ttl, "status": "success"})
+
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 @auth.route('/register', methods=['POST'])
 @token_required
 def register(current_admin):
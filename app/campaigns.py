@@ -0,0 +1,346 @@
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from firebase_admin import firestore
+from flask import current_app
+from google.api_core.exceptions import FailedPrecondition
+from app.firebase import get_db
+from app.models import Campaign, WRITE_BATCH_LIMIT
+from app.email_service import build_email_message, open_smtp_connection
+
+db = get_db()
+
+# Known SMTP provider limits: messages per minute, and messages sent over one
+# SMTP session before reconnecting. CAMPAIGN_RATE_PER_MINUTE and
+# CAMPAIGN_MESSAGES_PER_SESSION override these for the configured server.
+PROVIDER_LIMITS = {
+    'smtp.gmail.com': {'per_minute': 20, 'per_session': 100},
+    'smtp-relay.gmail.com': {'per_minute': 150, 'per_session': 100},
+    'smtp.sendgrid.net': {'per_minute': 600, 'per_session': 1000},
+    'smtp.mailgun.org': {'per_minute': 300, 'per_session': 1000},
+}
+DEFAULT_LIMITS = {'per_minute': 30, 'per_session': 100}
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def get_send_limits(config):
+    """Resolves the send rate and session size for the configured SMTP server."""
+    limits = dict(PROVIDER_LIMITS.get(config['SMTP_SERVER'], DEFAULT_LIMITS))
+    if config.get('CAMPAIGN_RATE_PER_MINUTE'):
+        limits['per_minute'] = config['CAMPAIGN_RATE_PER_MINUTE']
+    if config.get('CAMPAIGN_MESSAGES_PER_SESSION'):
+        limits['per_session'] = config['CAMPAIGN_MESSAGES_PER_SESSION']
+    return limits
+
+
+def campaign_progress(campaign):
+    """Adds processed/remaining counts, throughput and ETA to a campaign record."""
+    processed = campaign.get('sent_count', 0) + campaign.get('failed_count', 0) + campaign.get('unknown_count', 0)
+    remaining = max(campaign.get('total_recipients', 0) - processed, 0)
+
+    throughput = None
+    eta_seconds = None
+    run_started_at = campaign.get('run_started_at')
+    if campaign.get('status') == 'sending' and run_started_at:
+        elapsed = (_now() - run_started_at).total_seconds()
+        run_processed = campaign.get('run_processed_count', 0)
+        if elapsed > 0 and run_processed:
+            throughput = run_processed / elapsed * 60
+            eta_seconds = int(remaining / (throughput / 60))
+
+    campaign['progress'] = {
+        'processed': processed,
+        'remaining': remaining,
+        'throughputPerMinute': round(throughput, 2) if throughput else None,
+        'etaSeconds': eta_seconds,
+    }
+    return campaign
+
+
+@firestore.transactional
+def _claim_in_transaction(transaction, campaign_ref, worker_id, lease_seconds):
+    snapshot = campaign_ref.get(transaction=transaction)
+    if not snapshot.exists:
+        return False
+    campaign = snapshot.to_dict()
+    if campaign.get('status') not in ('ready', 'sending', 'paused'):
+        return False
+    lease_expires_at = campaign.get('lease_expires_at')
+    if campaign.get('status') == 'sending' and lease_expires_at and lease_expires_at > _now():
+        return False
+
+    transaction.update(campaign_ref, {
+        'status': 'sending',
+        'lease_owner': worker_id,
+        'lease_expires_at': _now() + timedelta(seconds=lease_seconds),
+        'run_started_at': _now(),
+        'run_processed_count': 0,
+    })
+    return True
+
+
+def claim_campaign(campaign_id, worker_id, lease_seconds):
+    """
+    Takes the sending lease for a campaign. Only one worker can hold it, and a
+    crashed worker's lease expires so another run can resume the campaign.
+    """
+    campaign_ref = db.collection('campaigns').document(campaign_id)
+    return _claim_in_transaction(db.transaction(), campaign_ref, worker_id, lease_seconds)
+
+
+def _recover_interrupted(recipients_ref, worker_id):
+    """
+    Recipients left in 'sending' by a crashed run may or may not have received
+    the email. They are marked 'unknown' instead of being retried, so a resumed
+    campaign never double-sends. Each update is conditional on the document not
+    having changed since it was read, so a late checkpoint from the previous
+    worker wins over recovery.
+    """
+    recovered = 0
+    for doc in recipients_ref.where('state', '==', 'sending').stream():
+        try:
+            doc.reference.update(
+                {'state': 'unknown', 'worker_id': worker_id},
+                option=db.write_option(last_update_time=doc.update_time)
+            )
+            recovered += 1
+        except FailedPrecondition:
+            pass
+    return recovered
+
+
+class _Throttle:
+    """Spaces sends evenly to stay under a per-minute limit."""
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute
+        self.next_send = time.monotonic()
+
+    def wait(self):
+        delay = self.next_send - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        self.next_send = max(self.next_send, time.monotonic()) + self.interval
+
+
+def _close_quietly(server):
+    try:
+        server.quit()
+    except Exception:
+        pass
+
+
+@firestore.transactional
+def _checkpoint_in_transaction(transaction, campaign_ref, worker_id, results, unsent, lease_seconds, extra):
+    # Only recipients this worker still owns are recorded. A run that was
+    # paused and re-sent may have had its chunk recovered as 'unknown' (and
+    # counted) by the new worker in the meantime.
+    entries = [(doc, state, error) for doc, state, error in results] + [(doc, 'pending', None) for doc in unsent]
+    snapshots = {snapshot.id: snapshot for snapshot in transaction.get_all([doc.reference for doc, _, _ in entries])}
+    campaign = campaign_ref.get(transaction=transaction).to_dict()
+
+    counts = {'sent': 0, 'failed': 0}
+    for doc, state, error in entries:
+        snapshot = snapshots.get(doc.id)
+        if snapshot is None or not snapshot.exists:
+            continue
+        current = snapshot.to_dict()
+        if current.get('state') != 'sending' or current.get('worker_id') != worker_id:
+            continue
+        update = {'state': state}
+        if state != 'pending':
+            update['processed_at'] = _now()
+            counts[state] += 1
+        if error:
+            update['error'] = error
+        transaction.update(doc.reference, update)
+
+    campaign_update = {
+        'sent_count': firestore.Increment(counts['sent']),
+        'failed_count': firestore.Increment(counts['failed']),
+        'run_processed_count': firestore.Increment(counts['sent'] + counts['failed']),
+    }
+    # Lease and status changes only apply while this worker holds the lease
+    if campaign.get('lease_owner') == worker_id:
+        campaign_update['lease_expires_at'] = _now() + timedelta(seconds=lease_seconds)
+        campaign_update['last_checkpoint_at'] = _now()
+        campaign_update.update(extra or {})
+    transaction.update(campaign_ref, campaign_update)
+
+
+def _checkpoint(campaign_ref, worker_id, results, lease_seconds, extra=None, unsent=()):
+    """
+    Records per-recipient outcomes and campaign counters in one transaction.
+    Recipients in `unsent` are returned to 'pending'.
+    """
+    _checkpoint_in_transaction(db.transaction(), campaign_ref, worker_id, results, list(unsent), lease_seconds, extra)
+
+
+def _pause_after_error(campaign_ref, worker_id, unsent, results, error):
+    """Checkpoints what was sent, returns unsent recipients to 'pending' and pauses."""
+    _checkpoint(campaign_ref, worker_id, results, 0, {
+        'status': 'paused',
+        'lease_owner': None,
+        'last_error': str(error),
+    }, unsent=unsent)
+
+
+@firestore.transactional
+def _requeue_in_transaction(transaction, campaign_ref, docs):
+    requeued = 0
+    for snapshot in transaction.get_all([doc.reference for doc in docs]):
+        if snapshot.exists and snapshot.get('state') == 'failed':
+            transaction.update(snapshot.reference, {'state': 'pending', 'error': firestore.DELETE_FIELD})
+            requeued += 1
+    transaction.update(campaign_ref, {'failed_count': firestore.Increment(-requeued)})
+    return requeued
+
+
+def requeue_failed(campaign_id):
+    """
+    Returns a stopped campaign's 'failed' recipients to 'pending' so the next
+    send retries them, e.g. once a provider quota has reset. A completed
+    campaign goes back to 'ready'. Returns the number requeued.
+    """
+    campaign_ref = db.collection('campaigns').document(campaign_id)
+    recipients_ref = Campaign.recipients_ref(campaign_id)
+    requeued = 0
+    while True:
+        docs = list(recipients_ref.where('state', '==', 'failed').limit(WRITE_BATCH_LIMIT - 1).stream())
+        if not docs:
+            break
+        requeued += _requeue_in_transaction(db.transaction(), campaign_ref, docs)
+    if requeued and Campaign.get_by_id(campaign_id).get('status') == 'completed':
+        Campaign.update(campaign_id, {'status': 'ready'})
+    return requeued
+
+
+def run_campaign(campaign_id, worker_id=None):
+    """
+    Sends a campaign until every recipient is processed, the campaign is paused
+    or the lease is lost. Progress is checkpointed after every chunk.
+    Must be called inside an application context.
+    """
+    config = current_app.config
+    logger = current_app.logger
+    worker_id = worker_id or uuid.uuid4().hex
+    lease_seconds = config['CAMPAIGN_LEASE_SECONDS']
+
+    if not claim_campaign(campaign_id, worker_id, lease_seconds):
+        logger.info(f"Campaign {campaign_id} is not available to send")
+        return False
+
+    campaign = Campaign.get_by_id(campaign_id)
+    campaign_ref = db.collection('campaigns').document(campaign_id)
+    recipients_ref = Campaign.recipients_ref(campaign_id)
+    limits = get_send_limits(config)
+    chunk_size = max(1, min(100, limits['per_minute']))
+    throttle = _Throttle(limits['per_minute'])
+    max_failures = config['CAMPAIGN_MAX_CONSECUTIVE_FAILURES']
+
+    recovered = _recover_interrupted(recipients_ref, worker_id)
+    if recovered:
+        campaign_ref.update({'unknown_count': firestore.Increment(recovered)})
+
+    server = None
+    session_sent = 0
+    failure_streak = []
+    try:
+        while True:
+            current = campaign_ref.get().to_dict()
+            if current.get('status') != 'sending' or current.get('lease_owner') != worker_id:
+                logger.info(f"Campaign {campaign_id} stopped by status change to {current.get('status')}")
+                return False
+
+            pending = list(recipients_ref.where('state', '==', 'pending').limit(chunk_size).stream())
+            if not pending:
+                break
+
+            # Mark the chunk before sending so a crash can't lead to a resend
+            batch = db.batch()
+            for doc in pending:
+                batch.update(doc.reference, {'state': 'sending', 'worker_id': worker_id})
+            batch.commit()
+
+            results = []
+            for index, doc in enumerate(pending):
+                recipient = doc.get('email')
+                if server is None or session_sent >= limits['per_session']:
+                    if server is not None:
+                        _close_quietly(server)
+                    try:
+                        server = open_smtp_connection()
+                        session_sent = 0
+                    except Exception as e:
+                        # The provider is unreachable or rejecting us: pause
+                        # rather than burning through the list as failures.
+                        server = None
+                        _pause_after_error(campaign_ref, worker_id, pending[index:], results, e)
+                        logger.error(f"Campaign {campaign_id} paused, SMTP connection failed: {e}")
+                        return False
+
+                throttle.wait()
+                try:
+                    msg = build_email_message(campaign['subject'], campaign['message'], recipient)
+                    server.sendmail(config['ADMIN_EMAIL'], recipient, msg.as_string())
+                    session_sent += 1
+                    results.append((doc, 'sent', None))
+                    failure_streak = []
+                except Exception as e:
+                    logger.error(f"Campaign {campaign_id} failed to send to {recipient}: {e}")
+                    results.append((doc, 'failed', str(e)))
+                    failure_streak.append(doc)
+                    # The session may be unusable after an error; start a fresh one
+                    _close_quietly(server)
+                    server = None
+
+                    if len(failure_streak) >= max_failures:
+                        # Consecutive failures usually mean a provider quota or
+                        # block, not bad addresses: pause and return this chunk's
+                        # failures to pending (earlier ones can be requeued)
+                        streak_ids = {failed.id for failed in failure_streak}
+                        results = [result for result in results if result[0].id not in streak_ids]
+                        unsent = failure_streak + pending[index + 1:]
+                        _pause_after_error(campaign_ref, worker_id, unsent, results, e)
+                        logger.error(f"Campaign {campaign_id} paused after {len(failure_streak)} consecutive send failures: {e}")
+                        return False
+
+            _checkpoint(campaign_ref, worker_id, results, lease_seconds)
+
+        campaign_ref.update({'status': 'completed', 'completed_at': _now(), 'lease_owner': None})
+        logger.info(f"Campaign {campaign_id} completed")
+        return True
+    finally:
+        if server is not None:
+            _close_quietly(server)
+
+
+def start_campaign_worker(campaign_id):
+    """Runs a campaign on a background thread so the request returns immediately."""
+    app = current_app._get_current_object()
+
+    def worker():
+        with app.app_context():
+            try:
+                run_campaign(campaign_id)
+            except Exception as e:
+                app.logger.error(f"Campaign {campaign_id} worker crashed: {e}")
+
+    thread = threading.Thread(target=worker, name=f"campaign-{campaign_id}", daemon=True)
+    thread.start()
+    return thread
+
+
+def resume_stalled_campaigns():
+    """Runs every campaign whose sending lease has expired. Returns their IDs."""
+    resumed = []
+    for doc in db.collection('campaigns').where('status', '==', 'sending').stream():
+        lease_expires_at = doc.to_dict().get('lease_expires_at')
+        if lease_expires_at is None or lease_expires_at <= _now():
+            if run_campaign(doc.id):
+                resumed.append(doc.id)
+    return resumed
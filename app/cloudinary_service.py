@@ -1,12 +1,133 @@
+import hashlib
+import posixpath
+import re
 import cloudinary
 import cloudinary.uploader
 import cloudinary.api
+import cloudinary.utils
+from datetime import datetime
+from urllib.parse import urlparse, unquote
+from firebase_admin import firestore
 from flask import current_app
+from app.firebase import get_db
 
-def upload_media(file_to_upload, folder):
+db = get_db()
+
+# Uploaded files are hashed in chunks of this many bytes
+HASH_CHUNK_SIZE = 1024 * 1024
+
+def _content_hash(file_to_upload):
+    """Hashes the upload's stream in chunks, then rewinds it for the uploader."""
+    stream = file_to_upload.stream
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(HASH_CHUNK_SIZE), b''):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+def _asset_ref(content_hash, resource_type, folder):
+    # media_assets/<folder>-<resource_type>-<sha256>: one registry entry per
+    # distinct file per folder, so public inquiry uploads are never reused as
+    # admin portfolio media (or the other way round)
+    scope = folder.replace('/', '_')
+    return db.collection('media_assets').document(f"{scope}-{resource_type}-{content_hash}")
+
+@firestore.transactional
+def _acquire_asset(transaction, asset_ref, new_asset=None):
+    """
+    Adds a reference to a registered asset and returns it. If none exists and
+    new_asset is given, registers it with a single reference. Otherwise None.
+    """
+    snapshot = asset_ref.get(transaction=transaction)
+    if snapshot.exists:
+        transaction.update(asset_ref, {'ref_count': firestore.Increment(1), 'last_acquired_at': datetime.now()})
+        return snapshot.to_dict()
+    if new_asset is not None:
+        transaction.set(asset_ref, {**new_asset, 'ref_count': 1, 'last_acquired_at': datetime.now()})
+        return new_asset
+    return None
+
+@firestore.transactional
+def _release_asset(transaction, asset_ref):
+    """Drops one reference. Returns True when it was the last one."""
+    snapshot = asset_ref.get(transaction=transaction)
+    if not snapshot.exists:
+        return True
+    if snapshot.get('ref_count') <= 1:
+        transaction.delete(asset_ref)
+        return True
+    transaction.update(asset_ref, {'ref_count': firestore.Increment(-1)})
+    return False
+
+# --- Responsive renditions ---
+# Derived versions are requested as eager transformations at upload time and
+# their URLs are built from the same transformation parameters, so the stored
+# URLs match exactly what Cloudinary generates in the background.
+
+IMAGE_MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp', 'jpg': 'image/jpeg', 'png': 'image/png'}
+
+def image_eager_transformations():
+    config = current_app.config
+    return [
+        {'width': width, 'crop': 'limit', 'quality': 'auto', 'format': image_format}
+        for image_format in config['PORTFOLIO_IMAGE_FORMATS']
+        for width in config['PORTFOLIO_IMAGE_WIDTHS']
+    ]
+
+def _video_transformations():
+    config = current_app.config
+    return {
+        'preview': {'width': config['PORTFOLIO_VIDEO_PREVIEW_WIDTH'], 'crop': 'limit', 'quality': 'auto', 'format': 'mp4'},
+        'poster': {'start_offset': '0', 'width': config['PORTFOLIO_POSTER_WIDTH'], 'crop': 'limit', 'quality': 'auto', 'format': 'jpg'},
+    }
+
+def video_eager_transformations():
+    return list(_video_transformations().values())
+
+def _rendition_url(public_id, resource_type, transformation):
+    transformation = dict(transformation)
+    url, _ = cloudinary.utils.cloudinary_url(
+        public_id,
+        resource_type=resource_type,
+        format=transformation.pop('format'),
+        secure=True,
+        **transformation
+    )
+    return url
+
+def build_image_renditions(public_id):
+    """Returns a srcset-ready structure: one <source> entry per format, widest last."""
+    sources = {}
+    for transformation in image_eager_transformations():
+        image_format = transformation['format']
+        url = _rendition_url(public_id, 'image', transformation)
+        sources.setdefault(image_format, []).append(f"{url} {transformation['width']}w")
+    return {
+        'sources': [
+            {'type': IMAGE_MIME_TYPES.get(image_format, f"image/{image_format}"), 'srcset': ', '.join(entries)}
+            for image_format, entries in sources.items()
+        ],
+        'widths': current_app.config['PORTFOLIO_IMAGE_WIDTHS'],
+    }
+
+def build_video_renditions(public_id):
+    return {name: _rendition_url(public_id, 'video', transformation)
+            for name, transformation in _video_transformations().items()}
+
+def _request_eager(public_id, resource_type, eager):
+    # A deduplicated asset may have been uploaded without these renditions
+    try:
+        cloudinary.uploader.explicit(public_id, type='upload', resource_type=resource_type, eager=eager, eager_async=True)
+    except Exception as e:
+        current_app.logger.error(f"Cloudinary Eager Transformation Error: {e}")
+
+def upload_media(file_to_upload, folder, eager=None):
     """
     Uploads a file to Cloudinary.
     Determines resource_type (image/video/raw) based on the file's content type.
+    Identical files are only uploaded once per folder: the content hash is
+    looked up in the media_assets registry and the existing asset is reused on a match.
+    `eager` transformations are generated asynchronously by Cloudinary.
     """
     try:
         # --- ADDED: Logic to determine the correct resource type ---
@@ -20,29 +141,72 @@ def upload_media(file_to_upload, folder):
             # Default to 'raw' for documents like PDF, DOCX, etc.
             resource_type = 'raw'
 
+        asset_ref = _asset_ref(_content_hash(file_to_upload), resource_type, folder)
+        existing = _acquire_asset(db.transaction(), asset_ref)
+        if existing:
+            current_app.logger.info(f"Reusing existing asset {existing['public_id']} for {file_to_upload.filename}")
+            if eager:
+                _request_eager(existing['public_id'], resource_type, eager)
+            return {**existing, 'deduplicated': True}
+
         current_app.logger.info(f"Uploading {file_to_upload.filename} as resource_type: {resource_type}")
 
         # The uploader now uses the explicitly determined resource type
+        options = {'eager': eager, 'eager_async': True} if eager else {}
         upload_result = cloudinary.uploader.upload(
             file_to_upload,
             folder=folder,
-            resource_type=resource_type
+            resource_type=resource_type,
+            **options
         )
+
+        asset = {
+            'secure_url': upload_result.get('secure_url'),
+            'public_id': upload_result.get('public_id'),
+            'resource_type': resource_type,
+            'folder': folder,
+            'bytes': upload_result.get('bytes'),
+            'created_at': datetime.now()
+        }
+        registered = _acquire_asset(db.transaction(), asset_ref, asset)
+        if registered['public_id'] != asset['public_id']:
+            # Another request uploaded the same file first; keep theirs
+            cloudinary.uploader.destroy(asset['public_id'], resource_type=resource_type)
+            return {**registered, 'deduplicated': True}
         return upload_result
     except Exception as e:
         current_app.logger.error(f"Cloudinary Upload Error: {e}")
         return None
 
-def delete_media(public_id, resource_type="image"):
+_VERSION_SEGMENT = re.compile(r'^v\d+$')
+
+def parse_media_url(url):
+    """
+    Returns (public_id, resource_type) for a Cloudinary delivery URL such as a
+    stored secure_url, or None if it isn't one. Inquiries only store URLs.
+    """
+    # /<cloud_name>/<resource_type>/upload/[v<version>/]<public_id>[.<format>]
+    segments = [unquote(segment) for segment in urlparse(url or '').path.split('/')]
+    if 'upload' not in segments[2:]:
+        return None
+    upload_index = segments.index('upload', 2)
+    resource_type = segments[upload_index - 1]
+    rest = segments[upload_index + 1:]
+    versions = [i for i, segment in enumerate(rest) if _VERSION_SEGMENT.match(segment)]
+    if versions:
+        rest = rest[versions[0] + 1:]
+    public_id = '/'.join(rest)
+    if resource_type != 'raw':
+        # Raw public IDs keep their extension; images and videos don't
+        public_id = posixpath.splitext(public_id)[0]
+    return (public_id, resource_type) if public_id else None
+
+def release_media(public_id):
     """
-    Deletes a file from Cloudinary using its public ID.
+    Drops one registry reference to an asset. Returns True when the asset
+    should now be destroyed (last reference, or not tracked by the registry).
     """
-    try:
-        result = cloudinary.uploader.destroy(
-            public_id,
-            resource_type=resource_type
-        )
-        return result
-    except Exception as e:
-        current_app.logger.error(f"Cloudinary Deletion Error: {e}")
-        return None
\ No newline at end of file
+    matches = db.collection('media_assets').where('public_id', '==', public_id).limit(1).get()
+    if not matches:
+        return True
+    return _release_asset(db.transaction(), matches[0].reference)
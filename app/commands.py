@@ -0,0 +1,79 @@
+import click
+
+def register_commands(app):
+    """
+    Registers maintenance commands, e.g. `flask --app run resume-campaigns`.
+    Intended for one-off use and for schedulers such as cron or Heroku Scheduler.
+    """
+
+    @app.cli.command('send-campaign')
+    @click.argument('campaign_id')
+    def send_campaign(campaign_id):
+        """Sends (or resumes) a campaign in the foreground."""
+        from app.campaigns import run_campaign
+        if run_campaign(campaign_id):
+            click.echo(f"Campaign {campaign_id} completed")
+        else:
+            click.echo(f"Campaign {campaign_id} did not complete; check its status")
+
+    @app.cli.command('resume-campaigns')
+    def resume_campaigns():
+        """Resumes campaigns whose sending worker died."""
+        from app.campaigns import resume_stalled_campaigns
+        resumed = resume_stalled_campaigns()
+        click.echo(f"Resumed {len(resumed)} campaign(s)")
+
+    @app.cli.command('rebuild-portfolio-index')
+    def rebuild_portfolio_index():
+        """Rebuilds the public portfolio listing index from the collection."""
+        from app.models import Portfolio
+        items, version = Portfolio.rebuild_index()
+        click.echo(f"Portfolio index rebuilt with {len(items)} item(s), version {version}")
+
+    @app.cli.command('backfill-analytics')
+    @click.option('--metric', type=click.Choice(['inquiries', 'contacts', 'subscribers']), multiple=True,
+                  help='Metric to rebuild (repeatable). Defaults to all.')
+    def backfill_analytics(metric):
+        """Rebuilds daily analytics buckets from historical data."""
+        from app import analytics
+        for name in metric or analytics.METRICS:
+            written = analytics.backfill(name)
+            click.echo(f"{name}: wrote {written} daily bucket(s)")
+
+    @app.cli.command('backfill-inquiry-search')
+    def backfill_inquiry_search():
+        """Adds search tokens to existing project inquiries."""
+        from app.models import ProjectInquiry
+        updated = ProjectInquiry.backfill_search_tokens()
+        click.echo(f"Updated search tokens on {updated} inquiry(ies)")
+
+    @app.cli.command('process-media-cleanup')
+    def process_media_cleanup():
+        """Processes due Cloudinary deletion tasks."""
+        from app.media_cleanup import drain_tasks
+        totals = drain_tasks()
+        click.echo(f"Deleted {totals['deleted']} asset(s), {totals['retried']} scheduled for retry")
+
+    @app.cli.command('reconcile-media')
+    @click.option('--dry-run', is_flag=True, help='Only list orphaned assets.')
+    @click.option('--grace-hours', default=24, show_default=True, help='Ignore assets newer than this.')
+    def reconcile_media(dry_run, grace_hours):
+        """Finds Cloudinary assets no record references and deletes them."""
+        from app.media_cleanup import reconcile_orphans, drain_tasks
+        orphans = reconcile_orphans(dry_run=dry_run, grace_hours=grace_hours)
+        for public_id, resource_type in orphans:
+            click.echo(f"{resource_type}: {public_id}")
+        if dry_run:
+            click.echo(f"Found {len(orphans)} orphaned asset(s)")
+            return
+        totals = drain_tasks()
+        click.echo(f"Queued {len(orphans)} orphaned asset(s), deleted {totals['deleted']}")
+
+    @app.cli.command('archive-records')
+    @click.option('--dry-run', is_flag=True, help='Only count eligible records.')
+    def archive_records(dry_run):
+        """Moves old and finished contacts/inquiries into the archive collections."""
+        from app import archive
+        for kind in archive.ARCHIVES:
+            moved = archive.archive_records(kind, dry_run=dry_run)
+            click.echo(f"{kind}: {'would archive' if dry_run else 'archived'} {moved} record(s)")
@@ -0,0 +1,69 @@
+import gzip
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'application/x-ndjson', 'text/csv', 'text/plain', 'text/html')
+
+
+def _accepted_encodings(header):
+    """Parses Accept-Encoding into the set of codings with a non-zero q-value."""
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding)
+    return accepted
+
+
+def init_compression(app):
+    """
+    Compresses buffered responses above COMPRESS_MIN_SIZE bytes with brotli or
+    gzip, whichever the client accepts (brotli preferred). Streamed responses
+    such as the SSE feed and exports are left alone.
+    """
+
+    @app.after_request
+    def compress_response(response):
+        if (response.direct_passthrough or response.is_streamed
+                or response.status_code < 200 or response.status_code in (204, 304)
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        data = response.get_data()
+        if len(data) < app.config['COMPRESS_MIN_SIZE']:
+            return response
+
+        # The body depends on Accept-Encoding from here on, even if sent as-is
+        response.vary.add('Accept-Encoding')
+        accepted = _accepted_encodings(request.headers.get('Accept-Encoding', ''))
+        if brotli is not None and 'br' in accepted:
+            compressed = brotli.compress(data, quality=app.config['COMPRESS_BROTLI_QUALITY'])
+            encoding = 'br'
+        elif 'gzip' in accepted:
+            compressed = gzip.compress(data, compresslevel=app.config['COMPRESS_GZIP_LEVEL'])
+            encoding = 'gzip'
+        else:
+            return response
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        # Each encoding is a different representation, so a strong validator
+        # can't be shared with the identity body; weak ETags still revalidate
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
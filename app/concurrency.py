@@ -0,0 +1,40 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+
+# Separate pools per workload, so slow Cloudinary uploads can never take the
+# threads that quick Firestore/SMTP fan-outs need. Sizes come from config.
+POOL_SIZES = {
+    'io': 'CONCURRENT_IO_WORKERS',
+    'upload': 'UPLOAD_IO_WORKERS',
+}
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def _get_executor(pool, max_workers):
+    with _executors_lock:
+        if pool not in _executors:
+            _executors[pool] = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=pool)
+        return _executors[pool]
+
+
+def run_concurrently(*calls, pool='io'):
+    """
+    Runs independent, I/O-bound zero-argument callables at the same time and
+    returns their results in order. Each call gets its own app context.
+    Media uploads should pass pool='upload'.
+    Under the gevent entry point (run_async.py) the pool's threads are greenlets.
+    """
+    app = current_app._get_current_object()
+    executor = _get_executor(pool, app.config[POOL_SIZES[pool]])
+
+    def in_app_context(call):
+        def run():
+            with app.app_context():
+                return call()
+        return run
+
+    futures = [executor.submit(in_app_context(call)) for call in calls]
+    return [future.result() for future in futures]
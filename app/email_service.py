@@ -3,35 +3,57 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from flask import current_app
 
-def send_email_notification(subject, message, recipient=None):
+# Sent to every new newsletter subscriber
+WELCOME_SUBJECT = "🎉 Thanks for Subscribing to Corexify!"
+WELCOME_MESSAGE = "Welcome to our newsletter! You'll now be the first to know about our latest projects, services, and offers."
+
+def build_email_message(subject, message, recipient):
+    """Builds the MIME message sent from the admin address."""
+    msg = MIMEMultipart()
+    msg['From'] = current_app.config['ADMIN_EMAIL']
+    msg['To'] = recipient
+    msg['Subject'] = subject
+
+    # Attach the message content
+    msg.attach(MIMEText(message, 'plain'))
+    return msg
+
+def open_smtp_connection():
+    """
+    Opens an authenticated SMTP session. Callers sending many emails should
+    reuse one session instead of paying a handshake per message.
+    """
+    # Connect to the SMTP server (e.g., Gmail)
+    server = smtplib.SMTP(current_app.config['SMTP_SERVER'], current_app.config['SMTP_PORT'])
+    server.starttls() # Secure the connection
+    # Log in using the credentials from your .env file
+    server.login(current_app.config['ADMIN_EMAIL'], current_app.config['EMAIL_PASSWORD'])
+    return server
+
+def send_email_notification(subject, message, recipient=None, server=None):
     """
     Sends an email notification using credentials from the app's configuration.
+    If an open SMTP session is passed as `server`, it is reused and left open.
     """
     try:
         # If no specific recipient is provided, it defaults to sending to you (the admin)
         if recipient is None:
             recipient = current_app.config['ADMIN_EMAIL']
-        
+
         # Create the email message structure
-        msg = MIMEMultipart()
-        msg['From'] = current_app.config['ADMIN_EMAIL']
-        msg['To'] = recipient
-        msg['Subject'] = subject
-        
-        # Attach the message content
-        msg.attach(MIMEText(message, 'plain'))
-        
-        # Connect to the SMTP server (e.g., Gmail)
-        server = smtplib.SMTP(current_app.config['SMTP_SERVER'], current_app.config['SMTP_PORT'])
-        server.starttls() # Secure the connection
-        # Log in using the credentials from your .env file
-        server.login(current_app.config['ADMIN_EMAIL'], current_app.config['EMAIL_PASSWORD'])
+        msg = build_email_message(subject, message, recipient)
+
+        if server is not None:
+            server.sendmail(current_app.config['ADMIN_EMAIL'], recipient, msg.as_string())
+            return True
+
+        server = open_smtp_connection()
         # Send the email
         server.sendmail(current_app.config['ADMIN_EMAIL'], recipient, msg.as_string())
         server.quit()
-        
+
         return True
     except Exception as e:
         # --- CORRECTED: Use the app logger instead of print for better error handling ---
         current_app.logger.error(f"Error sending email: {e}")
-        return False
\ No newline at end of file
+        return False
@@ -0,0 +1,111 @@
+import csv
+import io
+import zlib
+from datetime import datetime, timedelta
+from flask import current_app
+from app.firebase import get_db
+from app.models import iter_documents
+from app.utils import format_date
+
+db = get_db()
+
+# Exportable datasets: the Firestore collection, the timestamp used for
+# ordering and date filtering, and the default CSV columns.
+EXPORTS = {
+    'subscribers': {
+        'collection': 'subscribers',
+        'date_field': 'subscribed_at',
+        'fields': ['email', 'subscribed_at'],
+    },
+    'contacts': {
+        'collection': 'contacts',
+        'date_field': 'created_at',
+        'fields': ['name', 'email', 'message', 'read', 'created_at'],
+    },
+    'inquiries': {
+        'collection': 'project_inquiries',
+        'date_field': 'created_at',
+        'fields': [
+            'name', 'email', 'phone', 'company', 'city', 'state', 'country',
+            'clientType', 'isFinalYearProject', 'domain', 'projectType',
+            'startDate', 'timeline', 'budget', 'message', 'attached_files',
+            'status', 'created_at'
+        ],
+    },
+}
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def parse_date(value):
+    """Parses a YYYY-MM-DD query parameter. Raises ValueError when malformed."""
+    return datetime.strptime(value, '%Y-%m-%d')
+
+
+def build_export_query(dataset, start=None, end=None, fields=None):
+    """
+    Builds the ordered Firestore query for an export.
+    `end` is inclusive of the whole day. When fields are given, only those
+    fields (plus the date field needed for cursors) are fetched.
+    """
+    config = EXPORTS[dataset]
+    date_field = config['date_field']
+    query = db.collection(config['collection'])
+    if start:
+        query = query.where(date_field, '>=', start)
+    if end:
+        query = query.where(date_field, '<', end + timedelta(days=1))
+    query = query.order_by(date_field)
+    if fields:
+        query = query.select(list(dict.fromkeys(fields + [date_field])))
+    return query
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, list):
+        return '; '.join(str(item) for item in value)
+    return format_date(value)
+
+
+def generate_rows(dataset, export_format, query, fields=None, page_size=500):
+    """Yields the export body as text chunks, one row at a time."""
+    if export_format == 'csv':
+        columns = ['id'] + (fields or EXPORTS[dataset]['fields'])
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        for doc in iter_documents(query, page_size):
+            record = doc.to_dict()
+            writer.writerow([doc.id] + [_csv_value(record.get(column)) for column in columns[1:]])
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue()
+    else:
+        for doc in iter_documents(query, page_size):
+            record = doc.to_dict()
+            record.pop('search_tokens', None)
+            if fields:
+                record = {field: record.get(field) for field in fields}
+            yield current_app.json.dumps({'id': doc.id, **record}) + '\n'
+
+
+def gzip_stream(chunks, level=6):
+    """Compresses a stream of text chunks into a single gzip member on the fly."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def encode_stream(chunks):
+    for chunk in chunks:
+        if chunk:
+            yield chunk.encode('utf-8')
@@ -0,0 +1,40 @@
+from datetime import date, datetime
+import orjson
+from flask.json.provider import JSONProvider
+from app.utils import format_date
+
+
+def _default(value):
+    # orjson only handles exact datetime instances natively; Firestore returns
+    # DatetimeWithNanoseconds, a subclass, so route those through format_date.
+    if isinstance(value, datetime):
+        return format_date(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps_bytes(obj):
+    """Serializes to UTF-8 bytes, skipping the str round-trip for responses."""
+    return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONProvider(JSONProvider):
+    """
+    JSON provider backed by orjson. Datetimes are rendered as ISO 8601
+    strings via format_date instead of Flask's default HTTP-date format.
+    """
+
+    mimetype = 'application/json'
+
+    def dumps(self, obj, **kwargs):
+        return dumps_bytes(obj).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj), mimetype=self.mimetype)
@@ -0,0 +1,331 @@
+import threading
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+import cloudinary.api
+from firebase_admin import firestore
+from flask import current_app
+from google.api_core.exceptions import FailedPrecondition
+from app.firebase import get_db
+from app.models import iter_documents
+from app.cloudinary_service import release_media, parse_media_url
+
+db = get_db()
+
+TASKS_COLLECTION = 'media_cleanup_tasks'
+
+# Folders we upload into, with the resource types each can hold
+MEDIA_FOLDERS = {
+    'portfolio_thumbnails': ('image',),
+    'portfolio_videos': ('video',),
+    'project_inquiries': ('image', 'video', 'raw'),
+}
+
+# Cloudinary's delete_resources accepts at most 100 public IDs per call
+DELETE_BATCH_LIMIT = 100
+
+
+def _now():
+    return datetime.now(timezone.utc)
+
+
+def _as_aware(value):
+    # Naive datetimes written by this app are stored by Firestore as UTC
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def enqueue_media_deletion(public_id, resource_type="image", wake=True):
+    """
+    Records a durable deletion task and wakes the background worker, so the
+    calling request doesn't wait on Cloudinary. Returns the task ID.
+    """
+    task_ref = db.collection(TASKS_COLLECTION).document()
+    task_ref.set({
+        'public_id': public_id,
+        'resource_type': resource_type,
+        'status': 'pending',
+        'attempts': 0,
+        'released': False,
+        'next_attempt_at': _now(),
+        'created_at': _now(),
+    })
+    if wake:
+        cleanup_worker.wake()
+    return task_ref.id
+
+
+@firestore.transactional
+def _claim_in_transaction(transaction, limit, lease_seconds):
+    tasks = db.collection(TASKS_COLLECTION)
+    due = tasks.where('status', '==', 'pending').where('next_attempt_at', '<=', _now()).order_by('next_attempt_at').limit(limit)
+    stale = tasks.where('status', '==', 'processing').where('lease_expires_at', '<=', _now()).limit(limit)
+    claimed = {doc.id: doc for doc in transaction.get(due)}
+    for doc in transaction.get(stale):
+        claimed.setdefault(doc.id, doc)
+
+    claimed = list(claimed.values())[:limit]
+    for doc in claimed:
+        transaction.update(doc.reference, {
+            'status': 'processing',
+            'lease_expires_at': _now() + timedelta(seconds=lease_seconds),
+        })
+    return claimed
+
+
+def claim_tasks(limit=DELETE_BATCH_LIMIT, lease_seconds=300):
+    """Claims due tasks (and tasks whose worker died) so only one worker processes each."""
+    return _claim_in_transaction(db.transaction(), limit, lease_seconds)
+
+
+def _retry_update(task, error):
+    config = current_app.config
+    attempts = task.get('attempts', 0) + 1
+    if attempts >= config['MEDIA_CLEANUP_MAX_ATTEMPTS']:
+        return {'status': 'failed', 'attempts': attempts, 'last_error': error}
+    backoff = config['MEDIA_CLEANUP_BACKOFF_SECONDS'] * (2 ** (attempts - 1))
+    return {
+        'status': 'pending',
+        'attempts': attempts,
+        'last_error': error,
+        'next_attempt_at': _now() + timedelta(seconds=min(backoff, 6 * 3600)),
+    }
+
+
+def process_tasks(docs):
+    """
+    Releases registry references, then destroys assets in batched Cloudinary
+    calls per resource type. Finished tasks are removed; failed ones are
+    rescheduled with exponential backoff. Returns (deleted, retried) counts.
+    """
+    batch = db.batch()
+    to_destroy = {}
+    for doc in docs:
+        task = doc.to_dict()
+        try:
+            # Only release once, even if the Cloudinary call has to be retried
+            should_destroy = task.get('destroy', True)
+            if not task.get('released'):
+                should_destroy = release_media(task['public_id'])
+                doc.reference.update({'released': True, 'destroy': should_destroy})
+            if should_destroy:
+                to_destroy.setdefault(task['resource_type'], []).append((doc, task))
+            else:
+                batch.delete(doc.reference)
+        except Exception as e:
+            batch.update(doc.reference, _retry_update(task, str(e)))
+
+    deleted = retried = 0
+    for resource_type, entries in to_destroy.items():
+        for i in range(0, len(entries), DELETE_BATCH_LIMIT):
+            chunk = entries[i:i + DELETE_BATCH_LIMIT]
+            try:
+                result = cloudinary.api.delete_resources(
+                    [task['public_id'] for _, task in chunk],
+                    resource_type=resource_type
+                )
+                outcomes = result.get('deleted', {})
+            except Exception as e:
+                current_app.logger.error(f"Cloudinary Batch Deletion Error: {e}")
+                outcomes = {task['public_id']: str(e) for _, task in chunk}
+
+            for doc, task in chunk:
+                outcome = outcomes.get(task['public_id'], 'missing from response')
+                if outcome in ('deleted', 'not_found'):
+                    batch.delete(doc.reference)
+                    deleted += 1
+                else:
+                    batch.update(doc.reference, _retry_update(task, outcome))
+                    retried += 1
+    batch.commit()
+    return deleted, retried
+
+
+def drain_tasks():
+    """Processes claimed batches until nothing is due. Returns the totals."""
+    totals = {'deleted': 0, 'retried': 0}
+    while True:
+        docs = claim_tasks(current_app.config['MEDIA_CLEANUP_BATCH_SIZE'])
+        if not docs:
+            return totals
+        deleted, retried = process_tasks(docs)
+        totals['deleted'] += deleted
+        totals['retried'] += retried
+
+
+def next_due_seconds():
+    """Seconds until the earliest pending or leased task is due, or None if there are none."""
+    tasks = db.collection(TASKS_COLLECTION)
+    due_times = []
+    for doc in tasks.where('status', '==', 'pending').order_by('next_attempt_at').limit(1).stream():
+        due_times.append(doc.get('next_attempt_at'))
+    for doc in tasks.where('status', '==', 'processing').order_by('lease_expires_at').limit(1).stream():
+        due_times.append(doc.get('lease_expires_at'))
+    if not due_times:
+        return None
+    return max((_as_aware(min(due_times)) - _now()).total_seconds(), 0)
+
+
+class CleanupWorker:
+    """
+    Drains the task queue on one background thread per process. Between
+    drains it sleeps until the next retry is due (or it is woken by a new
+    task), and exits once the queue is empty.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self._wakeup = threading.Event()
+        self.started = False
+
+    def wake(self):
+        app = current_app._get_current_object()
+        with self._lock:
+            self.started = True
+            self._wakeup.set()
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, args=(app,), name='media-cleanup', daemon=True)
+            self._thread.start()
+
+    def _run(self, app):
+        with app.app_context():
+            while True:
+                self._wakeup.clear()
+                delay = app.config['MEDIA_CLEANUP_IDLE_POLL_SECONDS']
+                try:
+                    drain_tasks()
+                    delay = next_due_seconds()
+                except Exception as e:
+                    app.logger.error(f"Media cleanup worker error: {e}")
+
+                if delay is None:
+                    with self._lock:
+                        if not self._wakeup.is_set():
+                            self._thread = None
+                            return
+                    continue
+                self._wakeup.wait(timeout=min(delay, app.config['MEDIA_CLEANUP_IDLE_POLL_SECONDS']))
+
+
+cleanup_worker = CleanupWorker()
+
+
+def init_media_cleanup(app):
+    """Starts the worker on each process's first request, so retries left by a previous process resume."""
+
+    @app.before_request
+    def start_cleanup_worker():
+        if not cleanup_worker.started:
+            cleanup_worker.wake()
+
+
+def _referenced_media():
+    """Counts how many portfolio items and live or archived inquiries use each public ID."""
+    references = Counter()
+
+    query = db.collection('portfolio').select(['thumbnail_public_id', 'video_public_id'])
+    for doc in query.stream():
+        data = doc.to_dict()
+        references.update(value for value in (data.get('thumbnail_public_id'), data.get('video_public_id')) if value)
+
+    for collection in ('project_inquiries', 'archived_inquiries'):
+        query = db.collection(collection).order_by('created_at').select(['attached_files', 'created_at'])
+        for doc in iter_documents(query):
+            for url in doc.to_dict().get('attached_files') or []:
+                media = parse_media_url(url)
+                if media:
+                    references[media[0]] += 1
+
+    return references
+
+
+def _queued_media():
+    """Public IDs with a deletion task still in progress."""
+    query = db.collection(TASKS_COLLECTION).where('status', 'in', ['pending', 'processing']).select(['public_id'])
+    return {doc.get('public_id') for doc in query.stream()}
+
+
+def _reconcile_registry(references, queued, cutoff, dry_run):
+    """
+    Compares each media_assets entry's ref_count with the documents that
+    actually use the asset. Entries nothing uses are removed and returned as
+    orphans; miscounted ones are corrected. Entries acquired after the cutoff
+    or with a queued task are left alone, since their document or release may
+    still be in flight. Returns (orphans, corrected).
+    """
+    orphans, corrected = [], 0
+    for doc in db.collection('media_assets').stream():
+        asset = doc.to_dict()
+        public_id = asset.get('public_id')
+        last_acquired_at = asset.get('last_acquired_at') or asset.get('created_at')
+        if public_id in queued or (last_acquired_at and _as_aware(last_acquired_at) > cutoff):
+            continue
+        used = references.get(public_id, 0)
+        if used == asset.get('ref_count'):
+            continue
+
+        if not dry_run:
+            # Skip the entry if an upload or release touched it since it was read
+            option = db.write_option(last_update_time=doc.update_time)
+            try:
+                if used:
+                    doc.reference.update({'ref_count': used}, option=option)
+                else:
+                    doc.reference.delete(option=option)
+            except FailedPrecondition:
+                continue
+        if used:
+            corrected += 1
+        else:
+            orphans.append((public_id, asset.get('resource_type', 'image')))
+    return orphans, corrected
+
+
+def _list_folder(folder, resource_type):
+    next_cursor = None
+    while True:
+        options = {'type': 'upload', 'prefix': f"{folder}/", 'resource_type': resource_type, 'max_results': 500}
+        if next_cursor:
+            options['next_cursor'] = next_cursor
+        result = cloudinary.api.resources(**options)
+        yield from result.get('resources', [])
+        next_cursor = result.get('next_cursor')
+        if not next_cursor:
+            return
+
+
+def reconcile_orphans(dry_run=False, grace_hours=24):
+    """
+    Finds media that no portfolio item or inquiry references and queues it for
+    deletion (run drain_tasks to process them): registry entries nothing uses,
+    and assets in our Cloudinary folders that are neither referenced nor
+    registered. Registry ref counts that drifted are corrected. Anything
+    younger than the grace period is skipped since its record may still be
+    in the middle of being saved.
+    Returns the orphans found as (public_id, resource_type) pairs.
+    """
+    references = _referenced_media()
+    queued = _queued_media()
+    cutoff = _now() - timedelta(hours=grace_hours)
+
+    orphans, corrected = _reconcile_registry(references, queued, cutoff, dry_run)
+    if corrected:
+        current_app.logger.info(f"Corrected the reference count of {corrected} registered asset(s)")
+
+    registered = {doc.get('public_id') for doc in db.collection('media_assets').select(['public_id']).stream()}
+    found = {public_id for public_id, _ in orphans}
+    for folder, resource_types in MEDIA_FOLDERS.items():
+        for resource_type in resource_types:
+            for resource in _list_folder(folder, resource_type):
+                public_id = resource['public_id']
+                if public_id in references or public_id in queued or public_id in registered or public_id in found:
+                    continue
+                created_at = datetime.fromisoformat(resource['created_at'].replace('Z', '+00:00'))
+                if created_at > cutoff:
+                    continue
+                orphans.append((public_id, resource_type))
+
+    if not dry_run:
+        for public_id, resource_type in orphans:
+            enqueue_media_deletion(public_id, resource_type, wake=False)
+    return orphans
@@ -1,15 +1,46 @@
-from datetime import datetime
+import base64
+from datetime import datetime, timezone
+from firebase_admin import firestore
 from app.firebase import get_db
+from app.utils import build_search_tokens, normalize_search_term
+from app import analytics
+from app.concurrency import run_concurrently
 
 db = get_db()
 
+# Firestore limits: values per 'in' filter and writes per batch
+IN_QUERY_LIMIT = 30
+WRITE_BATCH_LIMIT = 500
+
+# Single document holding the ordered public portfolio listing
+PORTFOLIO_INDEX_REF = db.collection('site_indexes').document('portfolio')
+
+def iter_documents(query, page_size=500):
+    """
+    Yields every document matched by an ordered query, one page at a time.
+    Pages are chained with start_after cursors so memory use stays bounded.
+    """
+    last_doc = None
+    while True:
+        page = query.limit(page_size)
+        if last_doc is not None:
+            page = page.start_after(last_doc)
+        docs = list(page.stream())
+        yield from docs
+        if len(docs) < page_size:
+            return
+        last_doc = docs[-1]
+
 class Contact:
     @staticmethod
     def create(contact_data):
         contact_ref = db.collection('contacts').document()
         contact_data['created_at'] = datetime.now()
         contact_data['read'] = False
-        contact_ref.set(contact_data)
+        batch = db.batch()
+        batch.set(contact_ref, contact_data)
+        analytics.add_contact_rollup(batch, contact_data)
+        batch.commit()
         return contact_ref.id
 
     @staticmethod
@@ -34,43 +65,229 @@ class Contact:
     def delete(contact_id):
         db.collection('contacts').document(contact_id).delete()
 
+# Exact-match filters supported by ProjectInquiry.search. Each is paired with
+# created_at in firestore.indexes.json so filters can be combined.
+INQUIRY_FILTER_FIELDS = ('status', 'domain', 'projectType', 'budget', 'country')
+
+def inquiry_search_tokens(inquiry_data):
+    return build_search_tokens(inquiry_data.get('name'), inquiry_data.get('email'), inquiry_data.get('company'))
+
+def _search_record(doc):
+    record = {'id': doc.id, **doc.to_dict()}
+    record.pop('search_tokens', None)
+    return record
+
+def _encode_search_cursor(doc):
+    # The cursor carries the sort key itself, so paging keeps working after
+    # the document it points at is deleted or archived
+    value = f"{doc.get('created_at').isoformat()}|{doc.id}"
+    return base64.urlsafe_b64encode(value.encode('utf-8')).decode('ascii')
+
+def _decode_search_cursor(cursor):
+    """Returns (created_at, document_id). Raises ValueError for a malformed cursor."""
+    try:
+        created_at, doc_id = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8').split('|', 1)
+        return datetime.fromisoformat(created_at), doc_id
+    except (ValueError, UnicodeError):
+        raise ValueError("Invalid cursor")
+
+def search_documents(collection, filters=None, text=None, start=None, end=None, limit=100, cursor=None):
+    """
+    Newest-first search over a collection with created_at and search_tokens
+    fields, combining exact-field filters, a created_at range (end exclusive)
+    and a prefix term. Returns (records, next_cursor).
+    Raises ValueError when the cursor is malformed.
+    """
+    query = db.collection(collection)
+    for field, value in (filters or {}).items():
+        query = query.where(field, '==', value)
+    term = normalize_search_term(text)
+    if term:
+        query = query.where('search_tokens', 'array_contains', term)
+    if start:
+        query = query.where('created_at', '>=', start)
+    if end:
+        query = query.where('created_at', '<', end)
+    # Document ID breaks ties between equal timestamps (same order as the indexes' implicit one)
+    query = query.order_by('created_at', direction='DESCENDING').order_by('__name__', direction='DESCENDING')
+
+    if cursor:
+        created_at, doc_id = _decode_search_cursor(cursor)
+        query = query.start_after({'created_at': created_at, '__name__': db.collection(collection).document(doc_id)})
+
+    # Fetch one extra document to know whether another page exists
+    docs = list(query.limit(limit + 1).stream())
+    next_cursor = _encode_search_cursor(docs[limit - 1]) if len(docs) > limit else None
+    return [_search_record(doc) for doc in docs[:limit]], next_cursor
+
 class ProjectInquiry:
     @staticmethod
     def create(inquiry_data):
         inquiry_ref = db.collection('project_inquiries').document()
         inquiry_data['created_at'] = datetime.now()
         inquiry_data['status'] = 'new'
-        inquiry_ref.set(inquiry_data)
+        inquiry_data['search_tokens'] = inquiry_search_tokens(inquiry_data)
+        batch = db.batch()
+        batch.set(inquiry_ref, inquiry_data)
+        analytics.add_inquiry_rollup(batch, inquiry_data)
+        batch.commit()
         return inquiry_ref.id
 
     @staticmethod
     def get_all(limit=100):
         inquiries_ref = db.collection('project_inquiries').order_by('created_at', direction='DESCENDING').limit(limit)
-        return [{'id': doc.id, **doc.to_dict()} for doc in inquiries_ref.stream()]
+        return [_search_record(doc) for doc in inquiries_ref.stream()]
+
+    @staticmethod
+    def search(filters=None, text=None, start=None, end=None, limit=100, cursor=None):
+        """
+        Newest-first inquiries matching exact-field filters, a created_at range
+        (end exclusive) and a name/email/company prefix. Returns (inquiries,
+        next_cursor); pass next_cursor back to fetch the following page.
+        """
+        return search_documents('project_inquiries', filters, text, start, end, limit, cursor)
+
+    @staticmethod
+    def backfill_search_tokens():
+        """Adds search tokens to inquiries created before search existed. Returns the number updated."""
+        query = db.collection('project_inquiries').order_by('created_at')
+        updated = 0
+        batch = db.batch()
+        for doc in iter_documents(query):
+            data = doc.to_dict()
+            tokens = inquiry_search_tokens(data)
+            if data.get('search_tokens') == tokens:
+                continue
+            batch.update(doc.reference, {'search_tokens': tokens})
+            updated += 1
+            if updated % WRITE_BATCH_LIMIT == 0:
+                batch.commit()
+                batch = db.batch()
+        batch.commit()
+        return updated
 
     @staticmethod
     def get_by_id(inquiry_id):
         inquiry_ref = db.collection('project_inquiries').document(inquiry_id)
         inquiry = inquiry_ref.get()
         if inquiry.exists:
-            return {'id': inquiry.id, **inquiry.to_dict()}
+            return _search_record(inquiry)
         return None
 
     @staticmethod
-    def update_status(inquiry_id, status):
+    def update_status(inquiry_id, status, inquiry=None):
+        """Updates the status; pass the already-fetched inquiry to skip re-reading it."""
         inquiry_ref = db.collection('project_inquiries').document(inquiry_id)
-        inquiry_ref.update({'status': status})
+        if inquiry is None:
+            inquiry = inquiry_ref.get().to_dict() or {}
+        batch = db.batch()
+        batch.update(inquiry_ref, {'status': status})
+        analytics.add_inquiry_status_rollup(batch, inquiry, status)
+        batch.commit()
 
     @staticmethod
     def delete(inquiry_id):
         db.collection('project_inquiries').document(inquiry_id).delete()
 
+# Fields copied from each portfolio document into the public listing index
+PORTFOLIO_SUMMARY_FIELDS = (
+    'title', 'description', 'category', 'thumbnailUrl', 'videoUrl',
+    'renditions', 'technologies', 'status', 'created_at', 'updated_at'
+)
+
+def _as_utc(value):
+    # Firestore stores naive datetimes as UTC; match that so in-memory and
+    # stored values can be compared when ordering the index.
+    if isinstance(value, datetime) and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+def _portfolio_summary(portfolio_id, portfolio_data):
+    summary = {field: _as_utc(portfolio_data.get(field)) for field in PORTFOLIO_SUMMARY_FIELDS if field in portfolio_data}
+    return {'id': portfolio_id, **summary}
+
+def _read_portfolio_index(transaction):
+    snapshot = PORTFOLIO_INDEX_REF.get(transaction=transaction)
+    if snapshot.exists:
+        return snapshot.to_dict()
+    # No index yet: seed it from the collection inside the same transaction
+    query = db.collection('portfolio').order_by('created_at', direction='DESCENDING')
+    items = [_portfolio_summary(doc.id, doc.to_dict()) for doc in transaction.get(query)]
+    return {'items': items, 'version': 0}
+
+def _write_portfolio_index(transaction, index, portfolio_id, portfolio_data=None):
+    """Replaces (or removes, when portfolio_data is None) one entry and bumps the version."""
+    items = [item for item in index.get('items', []) if item['id'] != portfolio_id]
+    if portfolio_data is not None:
+        items.append(_portfolio_summary(portfolio_id, portfolio_data))
+    items.sort(key=lambda item: item.get('created_at') or datetime.min.replace(tzinfo=timezone.utc), reverse=True)
+    transaction.set(PORTFOLIO_INDEX_REF, {
+        'items': items,
+        'version': index.get('version', 0) + 1,
+        'updated_at': datetime.now()
+    })
+
+@firestore.transactional
+def _create_portfolio(transaction, portfolio_ref, portfolio_data):
+    index = _read_portfolio_index(transaction)
+    transaction.set(portfolio_ref, portfolio_data)
+    _write_portfolio_index(transaction, index, portfolio_ref.id, portfolio_data)
+
+@firestore.transactional
+def _update_portfolio(transaction, portfolio_ref, updates):
+    snapshot = portfolio_ref.get(transaction=transaction)
+    index = _read_portfolio_index(transaction)
+    transaction.update(portfolio_ref, updates)
+    _write_portfolio_index(transaction, index, portfolio_ref.id, {**(snapshot.to_dict() or {}), **updates})
+
+@firestore.transactional
+def _delete_portfolio(transaction, portfolio_ref):
+    index = _read_portfolio_index(transaction)
+    transaction.delete(portfolio_ref)
+    _write_portfolio_index(transaction, index, portfolio_ref.id)
+
+@firestore.transactional
+def _seed_portfolio_index(transaction):
+    index = _read_portfolio_index(transaction)
+    if not index.get('version'):
+        # Seeded from the collection rather than read: store it
+        index['version'] = 1
+        transaction.set(PORTFOLIO_INDEX_REF, {**index, 'updated_at': datetime.now()})
+    return index.get('items', []), index['version']
+
+@firestore.transactional
+def _rebuild_portfolio_index(transaction):
+    current = PORTFOLIO_INDEX_REF.get(transaction=transaction)
+    query = db.collection('portfolio').order_by('created_at', direction='DESCENDING')
+    items = [_portfolio_summary(doc.id, doc.to_dict()) for doc in transaction.get(query)]
+    version = current.to_dict().get('version', 0) + 1 if current.exists else 1
+    transaction.set(PORTFOLIO_INDEX_REF, {'items': items, 'version': version, 'updated_at': datetime.now()})
+    return items, version
+
 class Portfolio:
     @staticmethod
     def get_all():
         portfolio_ref = db.collection('portfolio').order_by('created_at', direction='DESCENDING')
         return [{'id': doc.id, **doc.to_dict()} for doc in portfolio_ref.stream()]
 
+    @staticmethod
+    def get_index():
+        """
+        Returns (summaries, version) for the public listing from the single
+        precomputed index document, building it first if it doesn't exist.
+        """
+        index = PORTFOLIO_INDEX_REF.get()
+        if not index.exists:
+            # Seeded in a transaction so it can't overwrite a concurrent create/update/delete
+            return _seed_portfolio_index(db.transaction())
+        index_data = index.to_dict()
+        return index_data.get('items', []), index_data.get('version', 0)
+
+    @staticmethod
+    def rebuild_index():
+        """Recomputes the listing index from the portfolio collection to repair drift."""
+        return _rebuild_portfolio_index(db.transaction())
+
     @staticmethod
     def get_by_id(portfolio_id):
         portfolio_ref = db.collection('portfolio').document(portfolio_id)
@@ -84,18 +301,18 @@ class Portfolio:
         portfolio_ref = db.collection('portfolio').document()
         portfolio_data['created_at'] = datetime.now()
         portfolio_data['updated_at'] = datetime.now()
-        portfolio_ref.set(portfolio_data)
+        _create_portfolio(db.transaction(), portfolio_ref, portfolio_data)
         return portfolio_ref.id
 
     @staticmethod
     def update(portfolio_id, updates):
         portfolio_ref = db.collection('portfolio').document(portfolio_id)
         updates['updated_at'] = datetime.now()
-        portfolio_ref.update(updates)
+        _update_portfolio(db.transaction(), portfolio_ref, updates)
 
     @staticmethod
     def delete(portfolio_id):
-        db.collection('portfolio').document(portfolio_id).delete()
+        _delete_portfolio(db.transaction(), db.collection('portfolio').document(portfolio_id))
 
 class AdminUser:
     @staticmethod
@@ -148,9 +365,56 @@ class Subscriber:
             'email': email.lower(),
             'subscribed_at': datetime.now()
         }
-        subscriber_ref.set(subscriber_data)
+        batch = db.batch()
+        batch.set(subscriber_ref, subscriber_data)
+        analytics.add_subscriber_rollup(batch, added=1, moment=subscriber_data['subscribed_at'])
+        batch.commit()
         return subscriber_ref.id
         
+    @staticmethod
+    def find_existing(emails):
+        """
+        Returns the subset of the given (lowercased) emails that are already subscribed.
+        Lookups are batched into 'in' queries of IN_QUERY_LIMIT values each,
+        run concurrently. Must be called inside an application context.
+        """
+        emails = list(emails)
+
+        def lookup(chunk):
+            query = db.collection('subscribers').where('email', 'in', chunk).select(['email'])
+            return [doc.get('email') for doc in query.stream()]
+
+        # The lookups are independent, so run them side by side
+        results = run_concurrently(*[
+            lambda chunk=emails[i:i + IN_QUERY_LIMIT]: lookup(chunk)
+            for i in range(0, len(emails), IN_QUERY_LIMIT)
+        ])
+        return {email for found in results for email in found}
+
+    @staticmethod
+    def create_many(emails, source=None):
+        """
+        Creates subscribers for already-validated, deduplicated emails using
+        batched writes. Returns the number of documents written.
+        """
+        emails = list(emails)
+        # One slot per batch is kept for the analytics bucket update
+        chunk_size = WRITE_BATCH_LIMIT - 1
+        for i in range(0, len(emails), chunk_size):
+            chunk = emails[i:i + chunk_size]
+            batch = db.batch()
+            analytics.add_subscriber_rollup(batch, added=len(chunk))
+            for email in chunk:
+                subscriber_data = {
+                    'email': email,
+                    'subscribed_at': datetime.now()
+                }
+                if source:
+                    subscriber_data['source'] = source
+                batch.set(db.collection('subscribers').document(), subscriber_data)
+            batch.commit()
+        return len(emails)
+
     @staticmethod
     def get_all(limit=500):
         subscribers_ref = db.collection('subscribers').order_by('subscribed_at', direction='DESCENDING').limit(limit)
@@ -168,4 +432,101 @@ class Subscriber:
 
     @staticmethod
     def delete(subscriber_id):
-        db.collection('subscribers').document(subscriber_id).delete()
\ No newline at end of file
+        batch = db.batch()
+        batch.delete(db.collection('subscribers').document(subscriber_id))
+        analytics.add_subscriber_rollup(batch, removed=1)
+        batch.commit()
+
+class SubscriberImport:
+    @staticmethod
+    def create(import_data):
+        import_ref = db.collection('subscriber_imports').document()
+        import_data['created_at'] = datetime.now()
+        import_data['status'] = 'running'
+        import_ref.set(import_data)
+        return import_ref.id
+
+    @staticmethod
+    def get_by_id(import_id):
+        import_doc = db.collection('subscriber_imports').document(import_id).get()
+        if import_doc.exists:
+            return {'id': import_doc.id, **import_doc.to_dict()}
+        return None
+
+    @staticmethod
+    def update(import_id, updates):
+        db.collection('subscriber_imports').document(import_id).update(updates)
+
+class Campaign:
+    @staticmethod
+    def create(campaign_data):
+        campaign_ref = db.collection('campaigns').document()
+        campaign_data['created_at'] = datetime.now()
+        campaign_data['status'] = 'draft'
+        campaign_data['total_recipients'] = 0
+        campaign_data['sent_count'] = 0
+        campaign_data['failed_count'] = 0
+        campaign_data['unknown_count'] = 0
+        campaign_ref.set(campaign_data)
+        return campaign_ref.id
+
+    @staticmethod
+    def get_all(limit=50):
+        campaigns_ref = db.collection('campaigns').order_by('created_at', direction='DESCENDING').limit(limit)
+        return [{'id': doc.id, **doc.to_dict()} for doc in campaigns_ref.stream()]
+
+    @staticmethod
+    def get_by_id(campaign_id):
+        campaign_ref = db.collection('campaigns').document(campaign_id)
+        campaign = campaign_ref.get()
+        if campaign.exists:
+            return {'id': campaign.id, **campaign.to_dict()}
+        return None
+
+    @staticmethod
+    def update(campaign_id, updates):
+        db.collection('campaigns').document(campaign_id).update(updates)
+
+    @staticmethod
+    def recipients_ref(campaign_id):
+        return db.collection('campaigns').document(campaign_id).collection('recipients')
+
+    @staticmethod
+    def snapshot_recipients(campaign_id):
+        """
+        Freezes the current subscriber list into the campaign's recipients
+        subcollection (keyed by subscriber ID) so later sign-ups or removals
+        don't change who the campaign is sent to. Returns the recipient count.
+        """
+        recipients_ref = Campaign.recipients_ref(campaign_id)
+        query = db.collection('subscribers').order_by('subscribed_at').select(['email', 'subscribed_at'])
+        total = 0
+        batch = db.batch()
+        for doc in iter_documents(query):
+            batch.set(recipients_ref.document(doc.id), {'email': doc.get('email'), 'state': 'pending'})
+            total += 1
+            if total % WRITE_BATCH_LIMIT == 0:
+                batch.commit()
+                batch = db.batch()
+        batch.commit()
+        Campaign.update(campaign_id, {'total_recipients': total, 'status': 'ready'})
+        return total
+
+    @staticmethod
+    def add_recipients(campaign_id, emails):
+        """Appends recipients to a campaign with batched writes. Returns the number added."""
+        recipients_ref = Campaign.recipients_ref(campaign_id)
+        emails = list(emails)
+        for i in range(0, len(emails), WRITE_BATCH_LIMIT):
+            batch = db.batch()
+            for email in emails[i:i + WRITE_BATCH_LIMIT]:
+                batch.set(recipients_ref.document(), {'email': email, 'state': 'pending'})
+            batch.commit()
+        return len(emails)
+
+    @staticmethod
+    def get_recipients(campaign_id, state=None, limit=100):
+        query = Campaign.recipients_ref(campaign_id)
+        if state:
+            query = query.where('state', '==', state)
+        return [{'id': doc.id, **doc.to_dict()} for doc in query.limit(limit).stream()]
@@ -0,0 +1,136 @@
+import atexit
+import re
+import threading
+from datetime import datetime
+from flask import current_app
+from app.email_service import send_email_notification
+
+
+class NotificationDigest:
+    """
+    Buffers admin-bound notifications and sends them as a single digest email
+    once the window elapses or the buffer reaches its size threshold.
+    Customer-facing emails should keep using send_email_notification directly.
+    """
+
+    def __init__(self):
+        self._items = []
+        self._lock = threading.Lock()
+        self._timer = None
+        self._app = None
+        # Set after a failed send: the timer retries, size-triggered flushes wait
+        self._retrying = False
+        atexit.register(self.flush, final=True)
+
+    def add(self, subject, message):
+        config = current_app.config
+        window = config['ADMIN_DIGEST_WINDOW_SECONDS']
+        if window <= 0:
+            return send_email_notification(subject=subject, message=message)
+
+        with self._lock:
+            self._app = current_app._get_current_object()
+            self._items.append((datetime.now(), subject, message))
+            full = len(self._items) >= config['ADMIN_DIGEST_MAX_ITEMS'] and not self._retrying
+            if full:
+                self._cancel_timer()
+            else:
+                self._schedule(window)
+
+        if full:
+            # Send off the request thread so the public endpoint isn't slowed down
+            threading.Thread(target=self.flush, daemon=True).start()
+        return True
+
+    def flush(self, final=False):
+        """
+        Sends everything buffered so far as one email. If the send fails the
+        items go back into the buffer for the next window; on the final flush
+        at shutdown they are written to the log instead.
+        """
+        with self._lock:
+            items, self._items = self._items, []
+            self._cancel_timer()
+            app = self._app
+        if not items or app is None:
+            return
+
+        with app.app_context():
+            if self._send(items):
+                with self._lock:
+                    self._retrying = False
+                return
+
+            if final:
+                app.logger.error(f"Admin digest failed to send at shutdown; dropping {len(items)} notification(s):\n{self._format(items)}")
+                return
+            app.logger.error(f"Admin digest of {len(items)} notification(s) failed to send; retrying next window")
+            with self._lock:
+                self._items[:0] = items
+                self._retrying = True
+                self._schedule(app.config['ADMIN_DIGEST_WINDOW_SECONDS'])
+
+    def _send(self, items):
+        if len(items) == 1:
+            _, subject, message = items[0]
+            return send_email_notification(subject=subject, message=message)
+        body = f"{len(items)} notifications since the last digest:\n\n" + self._format(items)
+        return send_email_notification(subject=f"📨 Corexify digest: {len(items)} new notifications", message=body)
+
+    @staticmethod
+    def _format(items):
+        sections = []
+        for received_at, subject, message in items:
+            sections.append(f"[{received_at.strftime('%Y-%m-%d %H:%M:%S')}] {subject}\n{message.strip()}")
+        return "\n\n----------\n\n".join(sections)
+
+    def _schedule(self, window):
+        # Caller holds the lock
+        if self._timer is None:
+            self._timer = threading.Timer(window, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _cancel_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+
+digest = NotificationDigest()
+
+
+# Magnitude suffixes used in budget answers, e.g. "$5k-$10k" or "1-3 Lakhs"
+BUDGET_MULTIPLIERS = {
+    'k': 1e3, 'thousand': 1e3,
+    'l': 1e5, 'lac': 1e5, 'lacs': 1e5, 'lakh': 1e5, 'lakhs': 1e5,
+    'm': 1e6, 'mn': 1e6, 'million': 1e6,
+    'cr': 1e7, 'crore': 1e7, 'crores': 1e7,
+}
+BUDGET_AMOUNT = re.compile(
+    r'(\d[\d,]*(?:\.\d+)?)\s*(thousand|lakhs?|lacs?|crores?|cr|million|mn|m|k|l)?\b',
+    re.IGNORECASE
+)
+
+
+def parse_budget(budget):
+    """Returns the largest amount mentioned in a free-form budget string (suffixes applied), or None."""
+    amounts = [
+        float(number.replace(',', '')) * BUDGET_MULTIPLIERS.get(suffix.lower(), 1)
+        for number, suffix in BUDGET_AMOUNT.findall(budget or '')
+    ]
+    return max(amounts) if amounts else None
+
+
+def is_high_priority_inquiry(inquiry_data):
+    """Project inquiries with a budget at or above the configured threshold skip the digest."""
+    threshold = current_app.config['PRIORITY_BUDGET_THRESHOLD']
+    budget = parse_budget(inquiry_data.get('budget'))
+    return threshold > 0 and budget is not None and budget >= threshold
+
+
+def notify_admin(subject, message, high_priority=False):
+    """Sends an admin notification, immediately when high priority, otherwise via the digest."""
+    if high_priority:
+        return send_email_notification(subject=subject, message=message)
+    return digest.add(subject, message)
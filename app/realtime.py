@@ -0,0 +1,114 @@
+import queue
+import threading
+from flask import current_app
+from app.firebase import get_db
+from app.json_provider import dumps_bytes
+
+db = get_db()
+
+# Collections the admin dashboard displays. Each one gets a single
+# Firestore on_snapshot listener per process, shared by every connected admin.
+WATCHED_COLLECTIONS = ('contacts', 'project_inquiries', 'subscribers', 'portfolio')
+
+# Firestore change types mapped to the event names sent to the dashboard
+CHANGE_TYPES = {'ADDED': 'added', 'MODIFIED': 'modified', 'REMOVED': 'removed'}
+
+
+def encode_event(event, data):
+    """Formats a single Server-Sent Events frame."""
+    payload = dumps_bytes(data).decode('utf-8')
+    return f"event: {event}\ndata: {payload}\n\n"
+
+
+class ChangeFeed:
+    """
+    Fans Firestore collection changes out to every connected admin.
+    Listeners are started lazily on the first subscriber and then kept running,
+    so the steady-state read cost is one read per changed document.
+    """
+
+    def __init__(self, collections=WATCHED_COLLECTIONS, queue_size=256):
+        self.collections = collections
+        self.queue_size = queue_size
+        self.counts = {}
+        self._ready = {name: threading.Event() for name in collections}
+        self._watches = {}
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._logger = None
+
+    def subscribe(self):
+        """Registers a new client and returns its event queue."""
+        client = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            self._logger = current_app.logger
+            self._subscribers.add(client)
+            for name in self.collections:
+                if name not in self._watches:
+                    self._watches[name] = db.collection(name).on_snapshot(self._make_callback(name))
+        return client
+
+    def unsubscribe(self, client):
+        with self._lock:
+            self._subscribers.discard(client)
+
+    def is_subscribed(self, client):
+        with self._lock:
+            return client in self._subscribers
+
+    def snapshot_counts(self, timeout=10):
+        """Returns the current document counters once every listener has synced."""
+        for ready in self._ready.values():
+            ready.wait(timeout)
+        with self._lock:
+            return dict(self.counts)
+
+    def _make_callback(self, collection):
+        def on_snapshot(col_snapshot, changes, read_time):
+            try:
+                self._handle_changes(collection, col_snapshot, changes)
+            except Exception as e:
+                if self._logger:
+                    self._logger.error(f"Change feed error on {collection}: {e}")
+        return on_snapshot
+
+    def _handle_changes(self, collection, col_snapshot, changes):
+        initial = not self._ready[collection].is_set()
+        with self._lock:
+            self.counts[collection] = len(col_snapshot)
+            counts = dict(self.counts)
+        self._ready[collection].set()
+
+        # The first snapshot reports every existing document as ADDED.
+        # Clients already have that data from the REST endpoints, so skip it.
+        if initial:
+            return
+
+        for change in changes:
+            document = change.document
+            event = {
+                'collection': collection,
+                'type': CHANGE_TYPES.get(change.type.name, change.type.name.lower()),
+                'id': document.id,
+            }
+            if event['type'] != 'removed':
+                data = document.to_dict()
+                # Internal search index, stripped by the REST endpoints too
+                data.pop('search_tokens', None)
+                event['data'] = data
+            self._broadcast(encode_event('change', event))
+        self._broadcast(encode_event('counters', counts))
+
+    def _broadcast(self, frame):
+        with self._lock:
+            clients = list(self._subscribers)
+        for client in clients:
+            try:
+                client.put_nowait(frame)
+            except queue.Full:
+                # A client that stops reading is dropped rather than allowed
+                # to grow its buffer without bound; its stream ends once drained.
+                self.unsubscribe(client)
+
+
+change_feed = ChangeFeed()
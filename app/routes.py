@@ -1,7 +1,10 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from app.models import Contact, ProjectInquiry, Portfolio, Subscriber
 from app.utils import validate_email, validate_phone
-from app.email_service import send_email_notification
+from app.email_service import send_email_notification, WELCOME_SUBJECT, WELCOME_MESSAGE
+from app.notifications import notify_admin, is_high_priority_inquiry
+from app.concurrency import run_concurrently
+from app.admission import limit_concurrency
 from app.cloudinary_service import upload_media
 import json
 
@@ -43,7 +46,7 @@ def contact():
         ---
         You can view this contact in your admin dashboard.
         """
-        send_email_notification(
+        notify_admin(
             subject=email_subject,
             message=email_message
         )
@@ -58,6 +61,7 @@ def contact():
         return jsonify({"error": str(e)}), 500
 
 @main.route('/api/project-inquiry', methods=['POST'])
+@limit_concurrency('upload')
 def project_inquiry():
     try:
         data = request.form.to_dict()
@@ -77,14 +81,20 @@ def project_inquiry():
             return jsonify({"error": "Invalid phone number"}), 400
         
         uploaded_files_urls = []
-        files = request.files.getlist('files')
+        files = [file for file in request.files.getlist('files') if file and file.filename]
+        max_files = current_app.config['MAX_INQUIRY_FILES']
+        if len(files) > max_files:
+            return jsonify({"error": f"At most {max_files} files can be attached"}), 400
         
         if files:
-            for file in files:
-                if file and file.filename:
-                    upload_result = upload_media(file, folder="project_inquiries")
-                    if upload_result and "secure_url" in upload_result:
-                        uploaded_files_urls.append(upload_result["secure_url"])
+            # Upload all attachments at the same time rather than one after another
+            uploads = run_concurrently(*[
+                lambda file=file: upload_media(file, folder="project_inquiries")
+                for file in files
+            ], pool='upload')
+            for upload_result in uploads:
+                if upload_result and "secure_url" in upload_result:
+                    uploaded_files_urls.append(upload_result["secure_url"])
         
         data['attached_files'] = uploaded_files_urls
         
@@ -132,9 +142,10 @@ def project_inquiry():
         You can view the full details of this inquiry in your admin dashboard.
         """
 
-        send_email_notification(
+        notify_admin(
             subject=email_subject,
-            message=email_message
+            message=email_message,
+            high_priority=is_high_priority_inquiry(data)
         )
         
         return jsonify({
@@ -149,11 +160,20 @@ def project_inquiry():
 @main.route('/api/portfolio', methods=['GET'])
 def get_portfolio():
     try:
-        portfolio_items = Portfolio.get_all()
-        return jsonify({
+        # Served from the single precomputed index document instead of the collection
+        portfolio_items, version = Portfolio.get_index()
+
+        category = request.args.get('category')
+        if category:
+            portfolio_items = [item for item in portfolio_items if (item.get('category') or '').lower() == category.lower()]
+
+        response = jsonify({
             "data": portfolio_items,
+            "version": version,
             "status": "success"
         })
+        response.set_etag(f"portfolio-v{version}")
+        return response.make_conditional(request)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -187,13 +207,6 @@ def subscribe_newsletter():
         if subscriber_id is None:
             return jsonify({"message": "You are already subscribed!", "status": "exists"}), 200
 
-        # Send a welcome email to the new subscriber
-        send_email_notification(
-            subject="🎉 Thanks for Subscribing to Corexify!",
-            message="Welcome to our newsletter! You'll now be the first to know about our latest projects, services, and offers.",
-            recipient=email
-        )
-        
         # --- ENHANCED ADMIN NOTIFICATION ---
         admin_email_subject = "📬 New Newsletter Subscriber"
         admin_email_message = f"""
@@ -204,9 +217,18 @@ def subscribe_newsletter():
         
         You can manage all subscribers from your admin dashboard.
         """
-        send_email_notification(
-            subject=admin_email_subject,
-            message=admin_email_message
+
+        # Send the welcome email and notify the admin at the same time
+        run_concurrently(
+            lambda: send_email_notification(
+                subject=WELCOME_SUBJECT,
+                message=WELCOME_MESSAGE,
+                recipient=email
+            ),
+            lambda: notify_admin(
+                subject=admin_email_subject,
+                message=admin_email_message
+            )
         )
 
         return jsonify({
@@ -0,0 +1,147 @@
+import csv
+import io
+import threading
+from datetime import datetime
+from flask import current_app
+from app.models import Subscriber, Campaign, SubscriberImport, WRITE_BATCH_LIMIT
+from app.campaigns import start_campaign_worker
+from app.utils import validate_email
+from app.email_service import WELCOME_SUBJECT, WELCOME_MESSAGE
+
+# How many rejected addresses are echoed back in the import summary
+MAX_INVALID_SAMPLES = 20
+
+
+def read_email_column(stream):
+    """
+    Lazily yields raw email values from an uploaded CSV stream.
+    Uses the column headed 'email' when present, otherwise the first column.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8-sig', errors='replace', newline='')
+    reader = csv.reader(text)
+    column = 0
+    for line_number, row in enumerate(reader, start=1):
+        if not row:
+            continue
+        if line_number == 1:
+            headers = [cell.strip().lower() for cell in row]
+            if 'email' in headers:
+                column = headers.index('email')
+                continue
+        if column < len(row):
+            yield row[column]
+
+
+def read_import(stream):
+    """
+    Validates and deduplicates the addresses in a CSV stream. This only parses
+    the file, so it is quick enough to run inside the upload request.
+    Returns (emails, summary) where summary counts the rejected rows.
+    """
+    summary = {
+        'totalRows': 0,
+        'invalid': 0,
+        'duplicatesInFile': 0,
+        'invalidSamples': [],
+    }
+    seen = set()
+    emails = []
+    for raw_email in read_email_column(stream):
+        summary['totalRows'] += 1
+        email = raw_email.strip().lower()
+
+        if not validate_email(email):
+            summary['invalid'] += 1
+            if len(summary['invalidSamples']) < MAX_INVALID_SAMPLES:
+                summary['invalidSamples'].append(raw_email)
+            continue
+
+        if email in seen:
+            summary['duplicatesInFile'] += 1
+            continue
+
+        seen.add(email)
+        emails.append(email)
+    return emails, summary
+
+
+def import_subscribers(emails, summary, send_welcome=True, source=None, created_by=None,
+                       chunk_size=WRITE_BATCH_LIMIT, on_progress=None):
+    """
+    Imports already-validated addresses. Every `chunk_size` addresses are
+    checked against Firestore with concurrent batched lookups and the new ones
+    written in one batch. Welcome emails are not sent here: new addresses are
+    queued as recipients of a welcome campaign (returned as welcomeCampaignId,
+    status 'ready'), which the caller hands to the throttled campaign worker.
+    `on_progress` is called with the summary after each chunk.
+    Returns the summary with the import counts added.
+    """
+    summary = {
+        **summary,
+        'imported': 0,
+        'alreadySubscribed': 0,
+        'processed': 0,
+        'welcomeEmailsQueued': 0,
+        'welcomeCampaignId': None,
+    }
+
+    for i in range(0, len(emails), chunk_size):
+        chunk = emails[i:i + chunk_size]
+        existing = Subscriber.find_existing(chunk)
+        new_emails = [email for email in chunk if email not in existing]
+        summary['alreadySubscribed'] += len(chunk) - len(new_emails)
+        summary['imported'] += Subscriber.create_many(new_emails, source=source)
+        if send_welcome and new_emails:
+            if summary['welcomeCampaignId'] is None:
+                summary['welcomeCampaignId'] = Campaign.create({
+                    'subject': WELCOME_SUBJECT,
+                    'message': WELCOME_MESSAGE,
+                    'created_by': created_by,
+                    'kind': 'welcome',
+                    'source': source,
+                })
+            summary['welcomeEmailsQueued'] += Campaign.add_recipients(summary['welcomeCampaignId'], new_emails)
+        summary['processed'] += len(chunk)
+        if on_progress:
+            on_progress(summary)
+
+    if summary['welcomeCampaignId']:
+        Campaign.update(summary['welcomeCampaignId'], {
+            'total_recipients': summary['welcomeEmailsQueued'],
+            'status': 'ready'
+        })
+    return summary
+
+
+def start_import_job(emails, summary, send_welcome=True, source=None, created_by=None):
+    """
+    Runs the import on a background thread so the upload request returns
+    immediately. Progress and the final summary are recorded on a
+    subscriber_imports document, whose ID is returned for polling.
+    """
+    app = current_app._get_current_object()
+    import_id = SubscriberImport.create({
+        'source': source,
+        'created_by': created_by,
+        'total_emails': len(emails),
+        'summary': summary,
+    })
+
+    def worker():
+        with app.app_context():
+            try:
+                result = import_subscribers(
+                    emails, summary, send_welcome=send_welcome, source=source, created_by=created_by,
+                    on_progress=lambda progress: SubscriberImport.update(import_id, {'summary': progress})
+                )
+                SubscriberImport.update(import_id, {'status': 'completed', 'summary': result, 'completed_at': datetime.now()})
+                # Welcome emails go out at the provider's rate on the campaign worker
+                if result['welcomeCampaignId']:
+                    start_campaign_worker(result['welcomeCampaignId'])
+            except Exception as e:
+                app.logger.error(f"Subscriber import {import_id} failed: {e}")
+                SubscriberImport.update(import_id, {'status': 'failed', 'error': str(e)})
+
+    thread = threading.Thread(target=worker, name=f"subscriber-import-{import_id}", daemon=True)
+    thread.start()
+    return import_id
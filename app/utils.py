@@ -17,4 +17,28 @@ def format_date(date_obj):
     """Format datetime object to string"""
     if isinstance(date_obj, datetime):
         return date_obj.isoformat()
-    return date_obj
\ No newline at end of file
+    return date_obj
+
+# Prefix search tokens are capped to keep indexed arrays small
+MIN_TOKEN_LENGTH = 2
+MAX_TOKEN_LENGTH = 20
+
+def normalize_search_term(term):
+    """Lowercase a search term and keep its longest word, matching build_search_tokens"""
+    words = re.findall(r'[\w@.+-]+', (term or '').lower())
+    if not words:
+        return ''
+    return max(words, key=len)[:MAX_TOKEN_LENGTH]
+
+def build_search_tokens(*values):
+    """Build the prefix tokens stored on a document for array-contains search"""
+    tokens = set()
+    for value in values:
+        words = re.findall(r'[\w@.+-]+', (value or '').lower())
+        # Email domains are searchable on their own, e.g. 'example.com'
+        words += [word.split('@', 1)[1] for word in words if '@' in word]
+        for word in words:
+            for end in range(MIN_TOKEN_LENGTH, min(len(word), MAX_TOKEN_LENGTH) + 1):
+                tokens.add(word[:end])
+    return sorted(tokens)
+
@@ -0,0 +1,115 @@
+"""
+Micro-benchmark for list endpoint payloads: serialization time and bytes on
+the wire, comparing Flask's stdlib-based default provider with the orjson
+provider plus gzip/brotli compression.
+
+Runs without Flask or Firestore: the two serializers below mirror
+flask.json.provider.DefaultJSONProvider and app/json_provider.py.
+
+    python benchmarks/json_payloads.py
+"""
+import gzip
+import json
+import random
+import timeit
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import orjson
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+class DatetimeWithNanoseconds(datetime):
+    """Stand-in for the datetime subclass Firestore returns."""
+
+
+def _stdlib_default(value):
+    # What Flask's DefaultJSONProvider does with datetimes
+    if isinstance(value, datetime):
+        return format_datetime(value, usegmt=True)
+    raise TypeError
+
+
+def stdlib_dumps(obj):
+    return json.dumps(obj, default=_stdlib_default, ensure_ascii=True, sort_keys=True).encode('utf-8')
+
+
+def _orjson_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError
+
+
+def orjson_dumps(obj):
+    return orjson.dumps(obj, default=_orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def _timestamp(rng):
+    moment = datetime(2025, 1, 1, tzinfo=timezone.utc) + timedelta(seconds=rng.randint(0, 300 * 86400))
+    return DatetimeWithNanoseconds(*moment.timetuple()[:6], tzinfo=timezone.utc)
+
+
+def make_payloads(seed=7):
+    rng = random.Random(seed)
+    words = "scalable mobile platform dashboard analytics student project ecommerce booking portal api".split()
+
+    def sentence(n):
+        return ' '.join(rng.choice(words) for _ in range(n)).capitalize() + '.'
+
+    inquiries = [{
+        'id': f"inq{i:05d}",
+        'name': f"Client {i}", 'email': f"client{i}@example.com", 'phone': '+91 98765 43210',
+        'company': f"Company {i % 37}", 'city': 'Pune', 'state': 'Maharashtra', 'country': 'India',
+        'clientType': rng.choice(['Student', 'Startup', 'Enterprise']),
+        'domain': rng.choice(['Web', 'Mobile', 'AI/ML', 'IoT']),
+        'projectType': rng.choice(['New build', 'Redesign', 'Maintenance']),
+        'timeline': '1-3 months', 'budget': rng.choice(['₹10,000 - ₹25,000', '₹50,000+']),
+        'message': sentence(60), 'attached_files': [f"https://res.cloudinary.com/demo/raw/upload/v1/f{i}.pdf"],
+        'status': rng.choice(['new', 'contacted', 'in_progress', 'completed']),
+        'created_at': _timestamp(rng),
+    } for i in range(100)]
+
+    subscribers = [{
+        'id': f"sub{i:05d}", 'email': f"reader{i}@example.com", 'subscribed_at': _timestamp(rng),
+    } for i in range(500)]
+
+    portfolio = [{
+        'id': f"pf{i:03d}", 'title': f"Case study {i}", 'description': sentence(40),
+        'category': rng.choice(['Web', 'Mobile', 'AI/ML']), 'status': 'completed',
+        'technologies': ['React', 'Flask', 'Firestore'],
+        'thumbnailUrl': f"https://res.cloudinary.com/demo/image/upload/v1/portfolio_thumbnails/t{i}.jpg",
+        'videoUrl': f"https://res.cloudinary.com/demo/video/upload/v1/portfolio_videos/v{i}.mp4",
+        'created_at': _timestamp(rng), 'updated_at': _timestamp(rng),
+    } for i in range(40)]
+
+    return {
+        '/admin/inquiries (100)': {'data': inquiries, 'status': 'success'},
+        '/admin/subscribers (500)': {'data': subscribers, 'status': 'success'},
+        '/api/portfolio (40)': {'data': portfolio, 'status': 'success'},
+    }
+
+
+def _time_us(fn, payload, number=200):
+    return min(timeit.repeat(lambda: fn(payload), number=number, repeat=5)) / number * 1e6
+
+
+def main():
+    print(f"{'payload':<26} {'stdlib us':>10} {'orjson us':>10} {'speedup':>8} "
+          f"{'raw B':>8} {'orjson B':>9} {'gzip B':>8} {'br B':>8}")
+    for name, payload in make_payloads().items():
+        baseline = stdlib_dumps(payload)
+        fast = orjson_dumps(payload)
+        stdlib_us = _time_us(stdlib_dumps, payload)
+        orjson_us = _time_us(orjson_dumps, payload)
+        gzip_size = len(gzip.compress(fast, compresslevel=6))
+        br_size = len(brotli.compress(fast, quality=5)) if brotli else None
+        print(f"{name:<26} {stdlib_us:>10.0f} {orjson_us:>10.0f} {stdlib_us / orjson_us:>7.1f}x "
+              f"{len(baseline):>8} {len(fast):>9} {gzip_size:>8} {br_size if br_size else 'n/a':>8}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,24 @@
+"""
+Async serving entry point. Run with gevent workers instead of the sync/gthread
+workers used by run.py, e.g.:
+
+    gunicorn --worker-class gevent --worker-connections 500 run_async:app
+
+Sockets, SSL and threads are monkey-patched into cooperative greenlets and
+gRPC is switched to gevent mode, so Firestore, Cloudinary and SMTP calls
+yield while waiting and a single process can hold hundreds of slow requests.
+"""
+from gevent import monkey
+monkey.patch_all()
+
+import grpc.experimental.gevent as grpc_gevent
+grpc_gevent.init_gevent()
+
+import os
+
+# Open change-feed streams only cost a greenlet here, not a worker thread
+os.environ.setdefault('SSE_MAX_STREAMS', '200')
+
+from app import create_app
+
+app = create_app()